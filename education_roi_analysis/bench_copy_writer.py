@@ -0,0 +1,107 @@
+import argparse
+import time
+
+import numpy as np
+from copy_writer import BinaryCopyWriter, MemoryViewReader
+
+COLUMNS = ('educational_level_id', 'demographic_id', 'year_id', 'annual_earnings')
+TYPES = ('int4', 'int4', 'int4', 'float8')
+
+
+def make_fact_columns(n_rows, seed=0):
+  rng = np.random.default_rng(seed)
+  return [
+    rng.integers(1, 9, n_rows).astype(float),
+    rng.integers(1, 19, n_rows).astype(float),
+    rng.integers(1, 19, n_rows).astype(float),
+    rng.normal(50000, 15000, n_rows),
+  ]
+
+
+def best_of(repeat, func):
+  timings = []
+  for _ in range(repeat):
+    start = time.perf_counter()
+    func()
+    timings.append(time.perf_counter() - start)
+  return min(timings)
+
+
+def bench_serialization(columns, repeat):
+  """Serialization only: binary COPY encoding vs the tuples and SQL literals execute_values builds"""
+  from psycopg2.extensions import adapt
+  writer = BinaryCopyWriter()
+
+  def binary_copy():
+    writer.encode(columns, TYPES)
+
+  def values_literals():
+    rows = [
+      (int(level), int(demographic), int(year), float(value))
+      for level, demographic, year, value in zip(*columns)
+    ]
+    b','.join(adapt(row).getquoted() for row in rows)
+
+  return {
+    'binary COPY encode': best_of(repeat, binary_copy),
+    'execute_values literals': best_of(repeat, values_literals),
+  }
+
+
+def bench_database(columns, repeat, dsn):
+  """End to end load into a temp table: binary COPY vs execute_values"""
+  import psycopg2
+  from psycopg2.extras import execute_values
+  conn = psycopg2.connect(dsn)
+  cur = conn.cursor()
+  cur.execute(f"""
+    CREATE TEMP TABLE bench_facts (
+      {COLUMNS[0]} INT, {COLUMNS[1]} INT, {COLUMNS[2]} INT, {COLUMNS[3]} FLOAT
+    )
+  """)
+  writer = BinaryCopyWriter()
+
+  def binary_copy():
+    cur.execute("TRUNCATE bench_facts")
+    view = writer.encode(columns, TYPES)
+    cur.copy_expert(
+      f"COPY bench_facts ({', '.join(COLUMNS)}) FROM STDIN WITH (FORMAT binary)",
+      MemoryViewReader(view)
+    )
+
+  def values_insert():
+    cur.execute("TRUNCATE bench_facts")
+    rows = [
+      (int(level), int(demographic), int(year), float(value))
+      for level, demographic, year, value in zip(*columns)
+    ]
+    execute_values(cur, f"INSERT INTO bench_facts ({', '.join(COLUMNS)}) VALUES %s", rows, page_size=1000)
+
+  try:
+    return {
+      'binary COPY load': best_of(repeat, binary_copy),
+      'execute_values load': best_of(repeat, values_insert),
+    }
+  finally:
+    conn.rollback()
+    conn.close()
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Microbenchmark of the binary COPY writer against execute_values")
+  parser.add_argument('--rows', type=int, default=200000)
+  parser.add_argument('--repeat', type=int, default=3)
+  parser.add_argument('--dsn', help="PostgreSQL DSN; when given, also time end-to-end loads")
+  args = parser.parse_args()
+
+  columns = make_fact_columns(args.rows)
+  results = bench_serialization(columns, args.repeat)
+  if args.dsn:
+    results.update(bench_database(columns, args.repeat, args.dsn))
+
+  print(f"{args.rows:,} fact rows, best of {args.repeat}")
+  for name, seconds in results.items():
+    print(f"{name:<26}{seconds * 1000:>10.1f} ms{args.rows / seconds:>14,.0f} rows/s")
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,91 @@
+import argparse
+import os
+import subprocess
+import sys
+
+# Entry point modules and the cumulative import-time budget for each, in milliseconds
+IMPORT_BUDGETS_MS = {
+  'extract_tabn334_10': 20,
+  'extract_tabn502_30': 20,
+  'load_tabn334_10': 20,
+  'load_tabn502_30': 20,
+  'education_roi_with_loans': 30,
+  'query_cache': 20,
+  'db_backend': 20,
+  'cashflow_simulator': 150,
+  'parquet_engine': 30,
+}
+
+# Heavy dependencies that must only be imported by the stages that use them
+LAZY_MODULES = ('pandas', 'numpy', 'psycopg2', 'openpyxl', 'duckdb')
+
+# Entry points that import numpy at the top on purpose: every path through
+# cashflow_simulator runs the vectorized simulation, so its budget includes numpy
+# and the eager check skips it
+EAGER_NUMPY_MODULES = ('cashflow_simulator',)
+
+
+def measure_import(module, cwd):
+  """
+  Import module in a fresh interpreter with -X importtime.
+  Returns (cumulative microseconds for the module, set of every module imported).
+  """
+  completed = subprocess.run(
+    [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+    cwd=cwd, capture_output=True, text=True
+  )
+  if completed.returncode != 0:
+    raise RuntimeError(f"Importing {module} failed:\n{completed.stderr}")
+
+  cumulative_us = None
+  imported = set()
+  for line in completed.stderr.splitlines():
+    if not line.startswith('import time:') or '|' not in line:
+      continue
+    _, cumulative, name = line[len('import time:'):].split('|')
+    name = name.strip()
+    if not cumulative.strip().isdigit():
+      continue
+    imported.add(name.split('.')[0])
+    if name == module:
+      cumulative_us = int(cumulative)
+  return cumulative_us, imported
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Fail if cold-start import time of the pipeline regresses")
+  parser.add_argument('--repeat', type=int, default=5, help="runs per module, the fastest one is kept")
+  parser.add_argument('--scale', type=float, default=1.0, help="multiply every budget, e.g. for slow CI machines")
+  args = parser.parse_args()
+
+  cwd = os.path.dirname(os.path.abspath(__file__))
+  failures = []
+  print(f"{'module':<28}{'best ms':>10}{'budget ms':>12}")
+  for module, budget_ms in IMPORT_BUDGETS_MS.items():
+    timings = []
+    imported = set()
+    for _ in range(args.repeat):
+      cumulative_us, imported = measure_import(module, cwd)
+      timings.append(cumulative_us / 1000)
+    best_ms = min(timings)
+    limit_ms = budget_ms * args.scale
+    print(f"{module:<28}{best_ms:>10.2f}{limit_ms:>12.2f}")
+
+    if best_ms > limit_ms:
+      failures.append(f"{module} imports in {best_ms:.2f} ms, budget is {limit_ms:.2f} ms")
+    lazy_modules = set(LAZY_MODULES)
+    if module in EAGER_NUMPY_MODULES:
+      lazy_modules.discard('numpy')
+    eager = sorted(imported.intersection(lazy_modules))
+    if eager:
+      failures.append(f"{module} eagerly imports {', '.join(eager)}")
+
+  if failures:
+    print("\nImport time regressions:")
+    for failure in failures:
+      print(f"  - {failure}")
+    sys.exit(1)
+  print("\nAll entry points within import budget")
+
+if __name__ == "__main__":
+  main()
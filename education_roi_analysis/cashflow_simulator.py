@@ -0,0 +1,326 @@
+import os
+
+import numpy as np
+from education_roi_with_loans import LoanROICalculator
+
+REPAYMENT_PLANS = ('standard', 'income_driven')
+
+
+def annual_loan_payment(principal, interest_rate, term_years):
+  """Vectorized annual payment of a fully amortizing loan paid monthly"""
+  r = interest_rate / 12
+  n = term_years * 12
+  if r == 0:
+    return principal / n * 12
+  return principal * (r * (1 + r)**n) / ((1 + r)**n - 1) * 12
+
+
+def standard_repayment_schedule(loan_amount, interest_rate, term_years, horizon_years):
+  """Payments per year (columns 0..horizon) for the standard amortization plan"""
+  payments = np.zeros((len(loan_amount), horizon_years + 1))
+  term = min(term_years, horizon_years)
+  payments[:, 1:term + 1] = annual_loan_payment(loan_amount, interest_rate, term_years)[:, None]
+  return payments
+
+
+def income_driven_repayment_schedule(loan_amount, earnings, interest_rate, income_share,
+                                     poverty_line, poverty_multiple, forgiveness_years):
+  """
+  Payments per year for an income-driven plan.
+  Each year the borrower pays income_share of discretionary income (earnings above
+  poverty_multiple * poverty_line), capped at the outstanding balance. Interest accrues
+  annually on the balance and whatever remains after forgiveness_years is forgiven.
+  """
+  n_keys, n_cols = earnings.shape
+  payments = np.zeros((n_keys, n_cols))
+  balance = loan_amount.astype(float).copy()
+  discretionary = np.maximum(earnings - poverty_multiple * poverty_line, 0)
+  for t in range(1, min(forgiveness_years, n_cols - 1) + 1):
+    balance = balance * (1 + interest_rate)
+    payment = np.minimum(income_share * discretionary[:, t], balance)
+    payments[:, t] = payment
+    balance = balance - payment
+  return payments
+
+
+def net_present_value(cash_flows, rate):
+  """NPV of each row of cash_flows (column t is year t) at one or many rates"""
+  years = np.arange(cash_flows.shape[1])
+  rate = np.asarray(rate, dtype=float).reshape(-1, 1)
+  return (cash_flows / (1 + rate)**years).sum(axis=1)
+
+
+def internal_rate_of_return(cash_flows, low=-0.99, high=10.0, iterations=100):
+  """
+  Vectorized IRR by bisection on every row of cash_flows at once.
+  Rows whose NPV does not change sign on [low, high] get NaN.
+  """
+  n_keys = cash_flows.shape[0]
+  lo = np.full(n_keys, low)
+  hi = np.full(n_keys, high)
+  npv_lo = net_present_value(cash_flows, lo)
+  npv_hi = net_present_value(cash_flows, hi)
+  valid = np.sign(npv_lo) != np.sign(npv_hi)
+  for _ in range(iterations):
+    mid = (lo + hi) / 2
+    npv_mid = net_present_value(cash_flows, mid)
+    same_side = np.sign(npv_mid) == np.sign(npv_lo)
+    lo = np.where(same_side, mid, lo)
+    npv_lo = np.where(same_side, npv_mid, npv_lo)
+    hi = np.where(same_side, hi, mid)
+  return np.where(valid, (lo + hi) / 2, np.nan)
+
+
+def break_even_year(cash_flows, discount_rate):
+  """First year in which cumulative discounted cash flow turns non-negative, NaN if never"""
+  years = np.arange(cash_flows.shape[1])
+  cumulative = np.cumsum(cash_flows / (1 + discount_rate)**years, axis=1)
+  reached = cumulative >= 0
+  return np.where(reached.any(axis=1), reached.argmax(axis=1), np.nan)
+
+
+def simulate_chunk(chunk, params):
+  """
+  Project cash flows for one chunk of (level, demographic, year) keys under every
+  repayment plan and return the metrics as a dict of arrays, one entry per plan.
+  """
+  horizon = params['horizon_years']
+  years = np.arange(horizon + 1)
+  growth = (1 + params['earnings_growth'])**years
+
+  education_cost = chunk['total_education_cost']
+  loan_amount = education_cost * params['loan_coverage']
+  earnings = chunk['annual_earnings'][:, None] * growth
+  baseline = chunk['baseline_earnings'][:, None] * growth
+  earnings[:, 0] = 0
+  baseline[:, 0] = 0
+  premium = earnings - baseline
+
+  schedules = {
+    'standard': standard_repayment_schedule(
+      loan_amount, params['interest_rate'], params['loan_term_years'], horizon
+    ),
+    'income_driven': income_driven_repayment_schedule(
+      loan_amount, earnings, params['interest_rate'], params['idr_income_share'],
+      params['idr_poverty_line'], params['idr_poverty_multiple'], params['idr_forgiveness_years']
+    ),
+  }
+
+  results = {}
+  for plan, payments in schedules.items():
+    cash_flows = premium - payments
+    cash_flows[:, 0] -= education_cost - loan_amount
+    results[plan] = {
+      'npv': net_present_value(cash_flows, params['discount_rate']),
+      'irr': internal_rate_of_return(cash_flows),
+      'break_even_year': break_even_year(cash_flows, params['discount_rate']),
+      'lifetime_earnings_premium': premium.sum(axis=1),
+      'total_loan_paid': payments.sum(axis=1),
+    }
+  return results
+
+
+class CashFlowSimulator:
+  def __init__(self, calculator, horizon_years=40, earnings_growth=0.02, discount_rate=0.03,
+               idr_income_share=0.10, idr_poverty_line=15060, idr_poverty_multiple=1.5,
+               idr_forgiveness_years=20, chunk_size=5000, max_workers=None):
+    self.calculator = calculator
+    self.horizon_years = horizon_years
+    self.earnings_growth = earnings_growth
+    self.discount_rate = discount_rate
+    self.idr_income_share = idr_income_share
+    self.idr_poverty_line = idr_poverty_line
+    self.idr_poverty_multiple = idr_poverty_multiple
+    self.idr_forgiveness_years = idr_forgiveness_years
+    self.chunk_size = chunk_size
+    self.max_workers = max_workers or os.cpu_count()
+
+  def simulation_params(self):
+    return {
+      'horizon_years': self.horizon_years,
+      'earnings_growth': self.earnings_growth,
+      'discount_rate': self.discount_rate,
+      'interest_rate': self.calculator.interest_rate,
+      'loan_term_years': self.calculator.loan_term_years,
+      'loan_coverage': self.calculator.loan_coverage,
+      'idr_income_share': self.idr_income_share,
+      'idr_poverty_line': self.idr_poverty_line,
+      'idr_poverty_multiple': self.idr_poverty_multiple,
+      'idr_forgiveness_years': self.idr_forgiveness_years,
+    }
+
+  def create_cashflow_table(self):
+    """Create the lifetime cash-flow results table"""
+    cur = self.calculator.cur
+    conn = self.calculator.conn
+    try:
+      cur.execute("""
+        DROP TABLE IF EXISTS education_roi_cashflow CASCADE;
+
+        CREATE TABLE education_roi_cashflow (
+          cashflow_id SERIAL PRIMARY KEY,
+          educational_level_id INT REFERENCES dim_educational_level(educational_level_id),
+          year_id INT REFERENCES dim_year(year_id),
+          demographic_id INT REFERENCES dim_demographic(demographics_id),
+          repayment_plan VARCHAR(20) NOT NULL,
+
+          npv NUMERIC(12,2),
+          irr NUMERIC(10,4),
+          break_even_year INT,
+          lifetime_earnings_premium NUMERIC(12,2),
+          total_loan_paid NUMERIC(12,2),
+
+          UNIQUE(educational_level_id, year_id, demographic_id, repayment_plan)
+        );
+      """)
+      conn.commit()
+      print("Cash-flow table created successfully")
+    except Exception as e:
+      conn.rollback()
+      print(f"Error creating cash-flow table: {str(e)}")
+      raise
+
+  def fetch_inputs(self):
+    """Fetch earnings, baseline earnings and cost for every (level, demographic, year)"""
+    cur = self.calculator.cur
+    cur.execute("""
+      WITH BaselineEarnings AS (
+        SELECT year_id, demographic_id, annual_earnings AS hs_annual_earnings
+        FROM Median_annual_earnings
+        WHERE educational_level_id = 2
+      )
+      SELECT
+        e.educational_level_id,
+        e.year_id,
+        e.demographic_id,
+        e.annual_earnings,
+        COALESCE(b.hs_annual_earnings, 0),
+        c.cost
+      FROM Median_annual_earnings e
+      LEFT JOIN BaselineEarnings b
+        ON e.year_id = b.year_id
+        AND e.demographic_id = b.demographic_id
+      JOIN expenditure_per_full_time_student c
+        ON e.educational_level_id = c.educational_level_id
+        AND e.year_id = c.year_id
+      WHERE e.annual_earnings > 0 AND c.cost > 0;
+    """)
+    rows = cur.fetchall()
+    data = np.array(rows, dtype=float).reshape(-1, 6)
+    return {
+      'educational_level_id': data[:, 0].astype(int),
+      'year_id': data[:, 1].astype(int),
+      'demographic_id': data[:, 2].astype(int),
+      'annual_earnings': data[:, 3],
+      'baseline_earnings': data[:, 4],
+      'total_education_cost': data[:, 5],
+    }
+
+  def simulate(self, inputs):
+    """Run the simulation chunked across a process pool and return metrics per plan"""
+    from concurrent.futures import ProcessPoolExecutor
+    n_keys = len(inputs['educational_level_id'])
+    params = self.simulation_params()
+    if n_keys == 0:
+      return {plan: None for plan in REPAYMENT_PLANS}
+
+    n_chunks = max(1, -(-n_keys // self.chunk_size))
+    bounds = np.array_split(np.arange(n_keys), n_chunks)
+    chunks = [
+      {key: values[idx[0]:idx[-1] + 1] for key, values in inputs.items()}
+      for idx in bounds
+    ]
+
+    if n_chunks == 1 or self.max_workers == 1:
+      partials = [simulate_chunk(chunk, params) for chunk in chunks]
+    else:
+      with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+        partials = list(pool.map(simulate_chunk, chunks, [params] * n_chunks))
+
+    return {
+      plan: {
+        metric: np.concatenate([partial[plan][metric] for partial in partials])
+        for metric in partials[0][plan]
+      }
+      for plan in REPAYMENT_PLANS
+    }
+
+  def save_results(self, inputs, results):
+    """Upsert simulated metrics into education_roi_cashflow"""
+    cur = self.calculator.cur
+    conn = self.calculator.conn
+    try:
+      values = []
+      for plan, metrics in results.items():
+        if metrics is None:
+          continue
+        for i in range(len(inputs['educational_level_id'])):
+          irr = metrics['irr'][i]
+          break_even = metrics['break_even_year'][i]
+          values.append((
+            int(inputs['educational_level_id'][i]),
+            int(inputs['year_id'][i]),
+            int(inputs['demographic_id'][i]),
+            plan,
+            round(float(metrics['npv'][i]), 2),
+            None if np.isnan(irr) else round(float(irr), 4),
+            None if np.isnan(break_even) else int(break_even),
+            round(float(metrics['lifetime_earnings_premium'][i]), 2),
+            round(float(metrics['total_loan_paid'][i]), 2),
+          ))
+
+      self.calculator.backend.execute_values(
+        cur,
+        """
+          INSERT INTO education_roi_cashflow (
+            educational_level_id, year_id, demographic_id, repayment_plan,
+            npv, irr, break_even_year, lifetime_earnings_premium, total_loan_paid
+          ) VALUES %s
+          ON CONFLICT (educational_level_id, year_id, demographic_id, repayment_plan) DO UPDATE
+          SET
+            npv = EXCLUDED.npv,
+            irr = EXCLUDED.irr,
+            break_even_year = EXCLUDED.break_even_year,
+            lifetime_earnings_premium = EXCLUDED.lifetime_earnings_premium,
+            total_loan_paid = EXCLUDED.total_loan_paid
+        """,
+        values,
+        page_size=1000
+      )
+      conn.commit()
+      self.calculator.cache.bump_version()
+      print(f"Cash-flow results saved for {len(values)} rows")
+    except Exception as e:
+      conn.rollback()
+      print(f"Error saving cash-flow results: {str(e)}")
+      raise
+
+  def run(self):
+    inputs = self.fetch_inputs()
+    results = self.simulate(inputs)
+    self.save_results(inputs, results)
+    return inputs, results
+
+
+def main():
+  db_params = {
+    'dbname': 'your_dbname',
+    'user': 'your_username',
+    'password': 'your_password',
+    'host': 'your_host',
+    'port': 'your_port'
+  }
+  calculator = LoanROICalculator(db_params)
+  simulator = CashFlowSimulator(calculator)
+
+  try:
+    calculator.connect()
+    simulator.create_cashflow_table()
+    simulator.run()
+  except Exception as e:
+    print(f"Error in main execution: {str(e)}")
+  finally:
+    calculator.disconnect()
+
+if __name__ == "__main__":
+  main()
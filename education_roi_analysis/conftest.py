@@ -0,0 +1,40 @@
+import os
+import sys
+
+import pytest
+
+MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, MODULE_DIR)
+
+
+@pytest.fixture
+def sqlite_roi_db(tmp_path):
+  """
+  SQLite database loaded from the bundled workbooks through the production loaders.
+  Returns the backend; the ROI table is created but not yet calculated.
+  """
+  pytest.importorskip('numpy')
+  pytest.importorskip('pandas')
+  pytest.importorskip('openpyxl')
+  from db_backend import SQLiteBackend
+  from load_tabn334_10 import CostDataLoader
+  from load_tabn502_30 import EducationDataLoader
+
+  backend = SQLiteBackend(str(tmp_path / 'roi.db'))
+  loader = EducationDataLoader(None, backend=backend)
+  loader.connect()
+  try:
+    loader.create_schema()
+    loader.insert_dimension_data()
+    loader.load_data(os.path.join(MODULE_DIR, 'tabn502_30.xlsx'))
+  finally:
+    loader.disconnect()
+
+  cost_loader = CostDataLoader(None, backend=backend)
+  cost_loader.connect()
+  try:
+    cost_loader.create_schema()
+    cost_loader.load_data(os.path.join(MODULE_DIR, 'tabn334_10.xlsx'))
+  finally:
+    cost_loader.disconnect()
+  return backend
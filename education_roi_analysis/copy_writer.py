@@ -0,0 +1,169 @@
+import io
+import struct
+
+import numpy as np
+
+COPY_SIGNATURE = b'PGCOPY\n\xff\r\n\x00'
+COPY_HEADER = COPY_SIGNATURE + struct.pack('>ii', 0, 0)
+COPY_TRAILER = struct.pack('>h', -1)
+
+# PostgreSQL column types supported by the writer and their big-endian wire format
+FIELD_FORMATS = {
+  'int4': '>i4',
+  'int8': '>i8',
+  'float8': '>f8',
+}
+
+# Largest integer every float64 represents exactly
+MAX_EXACT_FLOAT_INT = 2**53
+
+
+def column_values(values, type_name):
+  """
+  Return (values, nulls) for one column. float8 columns become float64 with NaN as
+  NULL. Integer columns keep an integer dtype: integer arrays are used as-is, float
+  arrays may only hold whole numbers up to 2**53 (NaN is NULL), and Python sequences
+  may use None for NULL. Anything that would be rounded or truncated raises ValueError.
+  """
+  if type_name == 'float8':
+    values = np.asarray(values, dtype=float)
+    return values, np.isnan(values)
+
+  values = np.asarray(values)
+  if values.dtype == object:
+    nulls = np.array([value is None for value in values], dtype=bool)
+    values = np.array([0 if value is None else value for value in values])
+    values, value_nulls = column_values(values, type_name)
+    return values, nulls | value_nulls
+
+  if values.dtype.kind == 'f':
+    nulls = np.isnan(values)
+    present = values[~nulls]
+    if (present != np.trunc(present)).any():
+      raise ValueError(f"Non-integer value in {type_name} column")
+    if (np.abs(present) > MAX_EXACT_FLOAT_INT).any():
+      raise ValueError(f"{type_name} value above 2**53 passed as float, pass an integer array")
+    values = np.where(nulls, 0, values).astype(np.int64)
+  elif values.dtype.kind in 'iub':
+    nulls = np.zeros(len(values), dtype=bool)
+    values = values.astype(np.int64)
+  else:
+    raise ValueError(f"Cannot write {values.dtype} values to a {type_name} column")
+
+  info = np.iinfo(FIELD_FORMATS[type_name])
+  if len(values) and (values.min() < info.min or values.max() > info.max):
+    raise ValueError(f"Value out of range for {type_name} column")
+  return values, nulls
+
+
+class MemoryViewReader:
+  """File-like reader over a memoryview, as expected by cursor.copy_expert"""
+
+  def __init__(self, view):
+    self.view = view
+    self.pos = 0
+
+  def read(self, size=-1):
+    end = len(self.view) if size is None or size < 0 else min(self.pos + size, len(self.view))
+    chunk = self.view[self.pos:end].tobytes()
+    self.pos = end
+    return chunk
+
+  def readline(self, size=-1):
+    return self.read(size)
+
+
+class BufferChain:
+  """Read-only file-like object that reads a list of byte buffers back to back"""
+
+  def __init__(self, buffers):
+    self.buffers = iter(buffers)
+    self.current = io.BytesIO(b'')
+
+  def read(self, size=-1):
+    chunks = []
+    while size < 0 or size > 0:
+      chunk = self.current.read(size)
+      if not chunk:
+        next_buffer = next(self.buffers, None)
+        if next_buffer is None:
+          break
+        self.current = io.BytesIO(next_buffer)
+        continue
+      chunks.append(chunk)
+      if size > 0:
+        size -= len(chunk)
+    return b''.join(chunks)
+
+  def readline(self, size=-1):
+    return self.read(size)
+
+
+class BinaryCopyWriter:
+  """
+  Serialize column arrays into PostgreSQL binary COPY format.
+  Every row is laid out as a NumPy structured record (field count, then length and
+  value of each field), so no Python object is created per row. NULLs (NaN) are
+  written with length -1 and their value bytes masked out. Integer columns never go
+  through float64 (see column_values). The output buffer is a bytearray reused across
+  calls; the returned memoryview is valid until the next call.
+  """
+
+  def __init__(self):
+    self.buffer = bytearray()
+
+  def encode(self, columns, types, header=True, trailer=True):
+    n_rows = len(columns[0]) if columns else 0
+    record_fields = [('field_count', '>i2')]
+    for i, type_name in enumerate(types):
+      record_fields.append((f'len_{i}', '>i4'))
+      record_fields.append((f'val_{i}', FIELD_FORMATS[type_name]))
+    records = np.empty(n_rows, dtype=np.dtype(record_fields))
+    records['field_count'] = len(types)
+
+    keep = None
+    offset = np.dtype('>i2').itemsize
+    for i, (values, type_name) in enumerate(zip(columns, types)):
+      values, nulls = column_values(values, type_name)
+      width = np.dtype(FIELD_FORMATS[type_name]).itemsize
+      records[f'len_{i}'] = np.where(nulls, -1, width)
+      records[f'val_{i}'] = np.where(nulls, 0, values)
+      if nulls.any():
+        if keep is None:
+          keep = np.ones((n_rows, records.dtype.itemsize), dtype=bool)
+        keep[nulls, offset + 4:offset + 4 + width] = False
+      offset += 4 + width
+
+    body = records.view(np.uint8).reshape(n_rows, records.dtype.itemsize)
+    body = body.ravel() if keep is None else body[keep]
+
+    size = len(COPY_HEADER) * header + body.nbytes + len(COPY_TRAILER) * trailer
+    if len(self.buffer) < size:
+      self.buffer = bytearray(size)
+    view = memoryview(self.buffer)[:size]
+    pos = 0
+    if header:
+      view[:len(COPY_HEADER)] = COPY_HEADER
+      pos = len(COPY_HEADER)
+    view[pos:pos + body.nbytes] = body
+    pos += body.nbytes
+    if trailer:
+      view[pos:pos + len(COPY_TRAILER)] = COPY_TRAILER
+    return view
+
+  def copy_to(self, cur, table_name, column_names, columns, types):
+    """COPY the given columns into table_name through cursor cur"""
+    view = self.encode(columns, types)
+    cur.copy_expert(
+      f"COPY {table_name} ({', '.join(column_names)}) FROM STDIN WITH (FORMAT binary)",
+      MemoryViewReader(view)
+    )
+    return len(columns[0]) if columns else 0
+
+
+def copy_buffers(cur, table_name, column_names, bodies):
+  """COPY several bodies encoded with header=False, trailer=False as one binary stream"""
+  cur.copy_expert(
+    f"COPY {table_name} ({', '.join(column_names)}) FROM STDIN WITH (FORMAT binary)",
+    BufferChain([COPY_HEADER, *bodies, COPY_TRAILER])
+  )
@@ -0,0 +1,214 @@
+class PostgresBackend:
+  """PostgreSQL through psycopg2, the production backend"""
+  dialect = 'postgresql'
+  supports_binary_copy = True
+
+  def __init__(self, db_params):
+    self.db_params = db_params
+    self.copy_writer = None
+
+  def connect(self):
+    import psycopg2
+    return psycopg2.connect(**self.db_params)
+
+  def cursor(self, conn):
+    return conn.cursor()
+
+  def named_cursor(self, conn, name, itersize=1000):
+    """Server-side cursor that fetches itersize rows per round trip"""
+    cur = conn.cursor(name=name)
+    cur.itersize = itersize
+    return cur
+
+  def execute_values(self, cur, sql, rows, page_size=100):
+    from psycopg2.extras import execute_values
+    execute_values(cur, sql, rows, page_size=page_size)
+
+  def copy_columns(self, cur, table_name, column_names, columns, types):
+    """Binary COPY through one writer per backend, so its buffer is reused across loads"""
+    if self.copy_writer is None:
+      from copy_writer import BinaryCopyWriter
+      self.copy_writer = BinaryCopyWriter()
+    return self.copy_writer.copy_to(cur, table_name, column_names, columns, types)
+
+  def copy_buffers(self, cur, table_name, column_names, bodies):
+    from copy_writer import copy_buffers
+    copy_buffers(cur, table_name, column_names, bodies)
+
+  def next_value(self, cur, sequence_name):
+    cur.execute("SELECT nextval(%s)", (sequence_name,))
+    return cur.fetchone()[0]
+
+  def lock_table(self, cur, table_name):
+    """Block other writers of table_name until the transaction ends; readers continue"""
+    cur.execute(f"LOCK TABLE {table_name} IN EXCLUSIVE MODE")
+
+
+# PostgreSQL constructs rewritten for SQLite, applied in order. The patterns are
+# compiled on first use so importing the module stays cheap for PostgreSQL runs.
+SQLITE_REWRITES = (
+  (r'\bBIGSERIAL\s+PRIMARY\s+KEY\b', 'INTEGER PRIMARY KEY AUTOINCREMENT'),
+  (r'\bSERIAL\s+PRIMARY\s+KEY\b', 'INTEGER PRIMARY KEY AUTOINCREMENT'),
+  (r'\bCREATE\s+SEQUENCE\s+IF\s+NOT\s+EXISTS\s+(\w+)', r'CREATE TABLE IF NOT EXISTS \1 (value INTEGER NOT NULL)'),
+  (r'\bDEFAULT\s+now\(\)', 'DEFAULT CURRENT_TIMESTAMP'),
+  (r'\s+CASCADE\b', ''),
+  (r'\s+ON\s+COMMIT\s+DROP\b', ''),
+  (r'\bIS\s+DISTINCT\s+FROM\b', 'IS NOT'),
+  (r'::\s*(numeric|float8?|int|integer|bigint|text)\b', ''),
+  (r'%\((\w+)\)s', r':\1'),
+  (r'%s', '?'),
+)
+_compiled_rewrites = None
+
+
+def translate_sql(sql):
+  """Rewrite the PostgreSQL dialect used by the pipeline into SQLite"""
+  global _compiled_rewrites
+  if _compiled_rewrites is None:
+    import re
+    _compiled_rewrites = [
+      (re.compile(pattern, re.I), replacement) for pattern, replacement in SQLITE_REWRITES
+    ]
+  for pattern, replacement in _compiled_rewrites:
+    sql = pattern.sub(replacement, sql)
+  return sql
+
+
+def split_statements(sql):
+  """Split an SQLite script into complete statements, dropping empty ones"""
+  import sqlite3
+  statements = []
+  current = ''
+  for part in sql.split(';'):
+    current += part + ';'
+    if sqlite3.complete_statement(current):
+      if current.strip().rstrip(';').strip():
+        statements.append(current.strip())
+      current = ''
+  if current.strip().rstrip(';').strip():
+    statements.append(current)
+  return statements
+
+
+class SQLiteCursor:
+  """Cursor wrapper that translates PostgreSQL SQL before running it on SQLite"""
+
+  def __init__(self, cur):
+    self.cur = cur
+    self.itersize = cur.arraysize
+
+  def execute(self, sql, params=None):
+    """
+    Run one statement, or a parameterless multi-statement script one statement at a
+    time. Like psycopg2, the first write opens a transaction, so DDL and DML stay
+    pending until the connection commits or rolls back. Plain SELECTs outside a
+    transaction do not open one, so an idle reader holds no lock that blocks writers.
+    """
+    if not self.cur.connection.in_transaction and not sql.lstrip().upper().startswith('SELECT'):
+      self.cur.execute("BEGIN")
+    sql = translate_sql(sql)
+    if params is None:
+      for statement in split_statements(sql):
+        self.cur.execute(statement)
+    else:
+      self.cur.execute(sql, params)
+    return self
+
+  def executemany(self, sql, rows):
+    self.cur.executemany(translate_sql(sql), rows)
+    return self
+
+  def fetchone(self):
+    return self.cur.fetchone()
+
+  def fetchall(self):
+    return self.cur.fetchall()
+
+  def fetchmany(self, size=None):
+    return self.cur.fetchmany(size or self.itersize)
+
+  def __iter__(self):
+    while True:
+      rows = self.cur.fetchmany(self.itersize)
+      if not rows:
+        return
+      yield from rows
+
+  @property
+  def rowcount(self):
+    return self.cur.rowcount
+
+  def close(self):
+    self.cur.close()
+
+
+def sqlite_md5(value):
+  import hashlib
+  return hashlib.md5(str(value).encode('utf-8')).hexdigest() if value is not None else None
+
+
+class SQLiteBackend:
+  """
+  In-process SQLite backend for tests, benchmarks and local runs.
+  SQL written for PostgreSQL is translated on the fly (SERIAL, CASCADE, casts,
+  placeholders, sequences); NUMERIC columns keep SQLite's numeric affinity.
+  """
+  dialect = 'sqlite'
+  supports_binary_copy = False
+
+  def __init__(self, database=':memory:'):
+    self.database = database
+
+  def connect(self):
+    import sqlite3
+    conn = sqlite3.connect(self.database)
+    conn.create_function('md5', 1, sqlite_md5, deterministic=True)
+    return conn
+
+  def cursor(self, conn):
+    return SQLiteCursor(conn.cursor())
+
+  def named_cursor(self, conn, name, itersize=1000):
+    cur = SQLiteCursor(conn.cursor())
+    cur.itersize = itersize
+    return cur
+
+  def execute_values(self, cur, sql, rows, page_size=100):
+    rows = list(rows)
+    if not rows:
+      return
+    placeholders = '(' + ', '.join(['?'] * len(rows[0])) + ')'
+    cur.executemany(sql.replace('VALUES %s', f'VALUES {placeholders}'), rows)
+
+  def copy_columns(self, cur, table_name, column_names, columns, types):
+    """Insert column arrays with executemany, NULLs as in BinaryCopyWriter"""
+    import numpy as np
+    from copy_writer import column_values
+    values = []
+    for column, type_name in zip(columns, types):
+      column, nulls = column_values(column, type_name)
+      converted = column.tolist()
+      for i in np.flatnonzero(nulls):
+        converted[i] = None
+      values.append(converted)
+    rows = list(zip(*values))
+    placeholders = ', '.join(['?'] * len(column_names))
+    cur.executemany(
+      f"INSERT INTO {table_name} ({', '.join(column_names)}) VALUES ({placeholders})",
+      rows
+    )
+    return len(rows)
+
+  def next_value(self, cur, sequence_name):
+    cur.execute(f"UPDATE {sequence_name} SET value = value + 1")
+    if cur.rowcount == 0:
+      cur.execute(f"INSERT INTO {sequence_name} (value) VALUES (1)")
+    cur.execute(f"SELECT value FROM {sequence_name}")
+    return cur.fetchone()[0]
+
+  def lock_table(self, cur, table_name):
+    """
+    SQLite locks the whole database, so take its write lock now with a write that
+    touches no rows. Other writers wait until the transaction ends.
+    """
+    cur.execute(f"UPDATE {table_name} SET rowid = rowid WHERE 0")
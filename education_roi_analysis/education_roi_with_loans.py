@@ -1,21 +1,179 @@
-import pandas as pd
-import psycopg2
-from psycopg2.extras import execute_values
-import numpy as np
+import os
+from db_backend import PostgresBackend
+from query_cache import QueryCache
+
+ROI_INPUTS_QUERY = """
+    WITH BaselineEarnings AS (
+      SELECT 
+        year_id,
+        demographic_id,
+        ROUND(annual_earnings::numeric, 2) as hs_annual_earnings
+      FROM Median_annual_earnings
+      WHERE educational_level_id = 2
+    ),
+    CostData AS (
+      SELECT 
+        educational_level_id,
+        year_id,
+        ROUND(CASE 
+          WHEN educational_level_id = 4 THEN cost   -- 2 years for Associate's
+          WHEN educational_level_id = 5 THEN cost   -- 4 years for all
+          WHEN educational_level_id = 6 THEN cost   -- 6 years for Bachelor's
+          ELSE cost
+        END::numeric, 2) as total_education_cost
+      FROM expenditure_per_full_time_student
+      WHERE year_id = 13
+    )
+    SELECT 
+      e.educational_level_id,
+      e.year_id,
+      e.demographic_id,
+      ROUND(e.annual_earnings::numeric, 2) as annual_earnings,
+      ROUND(b.hs_annual_earnings::numeric, 2) as baseline_earnings,
+      ROUND(c.total_education_cost::numeric, 2) as total_education_cost
+    FROM Median_annual_earnings e
+    LEFT JOIN BaselineEarnings b 
+      ON e.year_id = b.year_id 
+      AND e.demographic_id = b.demographic_id
+    LEFT JOIN CostData c 
+      ON e.educational_level_id = c.educational_level_id 
+      AND e.year_id = c.year_id
+    WHERE e.annual_earnings > 0 AND e.demographic_id = 15;
+"""
+
+ROI_SUMMARY_QUERY = """
+    SELECT 
+      el.education_level_name,
+      r.total_education_cost,
+      ROUND(r.loan_amount::numeric, 2) AS loan_amount,
+      ROUND(r.monthly_loan_payment::numeric, 2) AS monthly_payment,
+      ROUND(r.annual_earnings::numeric, 2) AS annual_earnings,
+      ROUND(r.net_monthly_earnings::numeric, 2) AS net_monthly_earnings,
+      ROUND(r.debt_to_income_ratio * 100::numeric, 2) AS debt_to_income_percent,
+      ROUND(r.years_to_break_even::numeric, 2) AS years_to_break_even
+    FROM 
+      education_roi_with_loans r
+    JOIN 
+      dim_educational_level el ON r.educational_level_id = el.educational_level_id;
+"""
+
+ROI_COLUMNS = (
+  'educational_level_id', 'year_id', 'demographic_id',
+  'total_education_cost', 'loan_amount', 'total_loan_cost', 'monthly_loan_payment',
+  'annual_earnings', 'baseline_earnings', 'net_monthly_earnings',
+  'total_investment', 'earnings_premium_monthly',
+  'net_roi_after_loans_10yr', 'debt_to_income_ratio', 'years_to_break_even'
+)
+ROI_COLUMN_TYPES = ('int4',) * 3 + ('float8',) * 12
+
+# Stored ROI rows whose key no longer has a costed row in roi_staging, either because
+# the cost dropped to zero or because the key vanished from the inputs altogether
+STALE_ROI_FILTER = """
+  NOT EXISTS (
+    SELECT 1 FROM roi_staging s
+    WHERE s.educational_level_id = education_roi_with_loans.educational_level_id
+      AND s.year_id = education_roi_with_loans.year_id
+      AND s.demographic_id = education_roi_with_loans.demographic_id
+      AND s.total_education_cost <> 0
+  )
+"""
+
+PERCENTILES = (5, 50, 95)
+MONTE_CARLO_METRICS = ('roi_percentage', 'years_to_break_even', 'debt_to_income_ratio')
+
+
+def percentile_bands(values):
+  """
+  Linear-interpolated PERCENTILES over every draw, where +inf sorts last.
+  A band is inf when it falls among (or next to) the infinite draws.
+  """
+  import numpy as np
+  values = np.sort(values)
+  positions = np.array(PERCENTILES) / 100 * (len(values) - 1)
+  finite = values[np.isfinite(values)]
+  if len(finite) == 0:
+    return np.full(len(PERCENTILES), np.inf)
+  bands = np.interp(positions, np.arange(len(finite)), finite)
+  return np.where(positions > len(finite) - 1, np.inf, bands)
+
+
+def simulate_roi_draws(chunk, params, seed_sequence):
+  """
+  Monte Carlo ROI draws for one chunk of keys and one block of params['n_draws'] draws.
+  Draws interest rates, lognormal earnings dispersion around the medians and cost
+  inflation from the expenditure trend, and returns, per key, a dict with the ROI
+  percentage, years to break even and debt-to-income ratio of every draw. Degree and
+  baseline earnings share a common shock with correlation earnings_correlation.
+  Draws that never break even have an infinite years_to_break_even.
+  """
+  import numpy as np
+  rng = np.random.default_rng(seed_sequence)
+  n_draws = params['n_draws']
+  n = params['loan_term_years'] * 12
+  results = []
+  for annual_earnings, baseline_earnings, total_education_cost, inflation_mean, inflation_std in zip(
+    chunk['annual_earnings'], chunk['baseline_earnings'], chunk['total_education_cost'],
+    chunk['inflation_mean'], chunk['inflation_std']
+  ):
+    interest_rate = np.maximum(
+      rng.normal(params['interest_rate'], params['interest_rate_std'], n_draws), 0
+    )
+    rho = params['earnings_correlation']
+    earnings_shock = rng.normal(0, 1, n_draws)
+    baseline_shock = rho * earnings_shock + np.sqrt(1 - rho**2) * rng.normal(0, 1, n_draws)
+    earnings = annual_earnings * np.exp(params['earnings_sigma'] * earnings_shock)
+    baseline = baseline_earnings * np.exp(params['earnings_sigma'] * baseline_shock)
+    inflation = rng.normal(inflation_mean, inflation_std, n_draws)
+    cost = total_education_cost * (1 + inflation)**params['cost_inflation_years']
+
+    loan_amount = cost * params['loan_coverage']
+    r = interest_rate / 12
+    growth = (1 + r)**n
+    with np.errstate(divide='ignore', invalid='ignore'):
+      monthly_payment = np.where(r > 0, loan_amount * r * growth / (growth - 1), loan_amount / n)
+      total_investment = cost + (monthly_payment * n - loan_amount)
+      net_roi = earnings * 10 - total_investment
+      roi_percentage = np.where(total_investment > 0, net_roi / total_investment * 100, 0)
+      debt_to_income = np.where(earnings > 0, monthly_payment * 12 / earnings, 0)
+      break_even = np.where(
+        earnings > baseline, total_investment / (earnings - baseline), np.inf
+      )
+
+    results.append(dict(zip(MONTE_CARLO_METRICS, (roi_percentage, break_even, debt_to_income))))
+  return results
+
+
+def roi_draw_bands(draws):
+  """
+  p5/p50/p95 of every metric over all draws of one key, plus never_break_even_share.
+  Draws that never break even are included, so the bands cover every draw.
+  """
+  import numpy as np
+  row = {}
+  for name in MONTE_CARLO_METRICS:
+    for pct, band in zip(PERCENTILES, percentile_bands(draws[name])):
+      row[f'{name}_p{pct}'] = float(band)
+  row['never_break_even_share'] = float(np.isinf(draws['years_to_break_even']).mean())
+  return row
+
 
 class LoanROICalculator:
-  def __init__(self, db_params):
+  def __init__(self, db_params, backend=None):
     self.db_params = db_params
+    self.backend = backend or PostgresBackend(db_params)
     self.conn = None
     self.cur = None
     self.interest_rate = round(0.0668, 4)  # 6.68% in decimal form
     self.loan_term_years = 10
     self.loan_coverage = round(0.70, 2)  # 70% of education cost is financed
+    self.cache = QueryCache(ttl_seconds=300, max_entries=128)
+    self.last_version = None
+    self.stream_count = 0
 
   def connect(self):
     try:
-      self.conn = psycopg2.connect(**self.db_params)
-      self.cur = self.conn.cursor()
+      self.conn = self.backend.connect()
+      self.cur = self.backend.cursor(self.conn)
       print("Database connection established")
     except Exception as e:
       print(f"Error connecting to database: {str(e)}")
@@ -43,13 +201,17 @@ class LoanROICalculator:
     total_payments = monthly_payment * self.loan_term_years * 12
     return round(total_payments, 2)
 
-  def create_roi_loan_table(self):
-    """Create the ROI calculation table"""
+  def create_roi_loan_table(self, reset=False):
+    """
+    Create the ROI calculation table, sequence and changelog if they do not exist.
+    With reset=True the ROI table is dropped and recreated, and a 'T' change tells
+    change feed consumers to resync from scratch.
+    """
     try:
+      if reset:
+        self.cur.execute("DROP TABLE IF EXISTS education_roi_with_loans CASCADE")
       self.cur.execute("""
-        DROP TABLE IF EXISTS education_roi_with_loans CASCADE;
-        
-        CREATE TABLE education_roi_with_loans (
+        CREATE TABLE IF NOT EXISTS education_roi_with_loans (
           roi_id SERIAL PRIMARY KEY,
           educational_level_id INT REFERENCES dim_educational_level(educational_level_id),
           year_id INT REFERENCES dim_year(year_id),
@@ -72,11 +234,37 @@ class LoanROICalculator:
           net_roi_after_loans_10yr NUMERIC(10,2),
           debt_to_income_ratio NUMERIC(10,2),
           years_to_break_even NUMERIC(10,2),
+
+          -- Change Tracking
+          row_version BIGINT,
+          row_hash CHAR(32),
           
           UNIQUE(educational_level_id, year_id, demographic_id)
         );
+
+        CREATE SEQUENCE IF NOT EXISTS education_roi_version_seq;
+
+        CREATE TABLE IF NOT EXISTS education_roi_changelog (
+          change_id BIGSERIAL PRIMARY KEY,
+          version BIGINT NOT NULL,
+          operation CHAR(1) NOT NULL CHECK (operation IN ('I', 'U', 'D', 'T')),
+          educational_level_id INT,
+          year_id INT,
+          demographic_id INT,
+          row_hash CHAR(32),
+          changed_at TIMESTAMP NOT NULL DEFAULT now()
+        );
+        CREATE INDEX IF NOT EXISTS idx_education_roi_changelog_version
+          ON education_roi_changelog (version);
       """)
+      if reset:
+        # The table was recreated, so consumers must resync from scratch
+        self.cur.execute(
+          "INSERT INTO education_roi_changelog (version, operation) VALUES (%s, 'T')",
+          (self.backend.next_value(self.cur, 'education_roi_version_seq'),)
+        )
       self.conn.commit()
+      self.cache.bump_version()
       print("ROI table created successfully")
     except Exception as e:
       self.conn.rollback()
@@ -85,139 +273,430 @@ class LoanROICalculator:
 
   def calculate_roi_with_loans(self):
     """Calculate ROI metrics with 2 decimal precision"""
+    import numpy as np
     try:
-      self.cur.execute("""
-        WITH BaselineEarnings AS (
-          SELECT 
-            year_id,
-            demographic_id,
-            ROUND(annual_earnings::numeric, 2) as hs_annual_earnings
-          FROM Median_annual_earnings
-          WHERE educational_level_id = 2
-        ),
-        CostData AS (
-          SELECT 
-            educational_level_id,
-            year_id,
-            ROUND(CASE 
-              WHEN educational_level_id = 4 THEN cost   -- 2 years for Associate's
-              WHEN educational_level_id = 5 THEN cost   -- 4 years for all
-              WHEN educational_level_id = 6 THEN cost   -- 6 years for Bachelor's
-              ELSE cost
-            END::numeric, 2) as total_education_cost
-          FROM expenditure_per_full_time_student
-          WHERE year_id = 13
-        )
-        SELECT 
-          e.educational_level_id,
-          e.year_id,
-          e.demographic_id,
-          ROUND(e.annual_earnings::numeric, 2) as annual_earnings,
-          ROUND(b.hs_annual_earnings::numeric, 2) as baseline_earnings,
-          ROUND(c.total_education_cost::numeric, 2) as total_education_cost
-        FROM Median_annual_earnings e
-        LEFT JOIN BaselineEarnings b 
-          ON e.year_id = b.year_id 
-          AND e.demographic_id = b.demographic_id
-        LEFT JOIN CostData c 
-          ON e.educational_level_id = c.educational_level_id 
-          AND e.year_id = c.year_id
-        WHERE e.annual_earnings > 0 AND e.demographic_id = 15;
-      """)
+      # Serialize runs so versions commit in the order they were taken
+      self.backend.lock_table(self.cur, 'education_roi_with_loans')
+      self.cur.execute(ROI_INPUTS_QUERY)
       
       rows = self.cur.fetchall()
-      
-      for row in rows:
-        educational_level_id, year_id, demographic_id, annual_earnings, baseline_earnings, total_education_cost = row
-        
-        total_education_cost = float(total_education_cost if total_education_cost else 0)
-        annual_earnings = float(annual_earnings if annual_earnings else 0)
-        baseline_earnings = float(baseline_earnings if baseline_earnings else 0)
-        
-        loan_amount = total_education_cost * self.loan_coverage
-        monthly_loan_payment = self.calculate_monthly_loan_payment(loan_amount)
-        total_loan_cost = self.calculate_total_loan_cost(loan_amount)
-        
-        net_monthly_earnings = (annual_earnings / 12) - monthly_loan_payment
-        earnings_premium_monthly = (annual_earnings - baseline_earnings) / 12
-        
-        total_investment = total_education_cost + (total_loan_cost - loan_amount)
-        net_roi_after_loans_10yr = (annual_earnings * 10) - total_investment
-        
-        roi_percentage_after_loans = (
-          ((net_roi_after_loans_10yr / total_investment) * 100) if total_investment > 0 else 0
-        )
-        debt_to_income_ratio = (
-          (monthly_loan_payment * 12 / annual_earnings) if annual_earnings > 0 else 0
+      data = np.array(
+        [[float(value) if value is not None else 0 for value in row] for row in rows], dtype=float
+      ).reshape(-1, 6)
+      educational_level_id, year_id, demographic_id = data[:, 0], data[:, 1], data[:, 2]
+      annual_earnings, baseline_earnings, total_education_cost = data[:, 3], data[:, 4], data[:, 5]
+
+      loan_amount = total_education_cost * self.loan_coverage
+      monthly_loan_payment = self.calculate_monthly_loan_payment(loan_amount)
+      total_loan_cost = np.round(monthly_loan_payment * self.loan_term_years * 12, 2)
+
+      net_monthly_earnings = (annual_earnings / 12) - monthly_loan_payment
+      earnings_premium_monthly = (annual_earnings - baseline_earnings) / 12
+
+      total_investment = total_education_cost + (total_loan_cost - loan_amount)
+      net_roi_after_loans_10yr = (annual_earnings * 10) - total_investment
+
+      with np.errstate(divide='ignore', invalid='ignore'):
+        debt_to_income_ratio = np.where(
+          annual_earnings > 0, monthly_loan_payment * 12 / annual_earnings, 0
         )
-        years_to_break_even = (
-          total_investment / (annual_earnings - baseline_earnings) 
-          if baseline_earnings and (annual_earnings > baseline_earnings) else 0
+        years_to_break_even = np.where(
+          (baseline_earnings != 0) & (annual_earnings > baseline_earnings),
+          total_investment / (annual_earnings - baseline_earnings), 0
         )
 
-        self.cur.execute("""
-          INSERT INTO education_roi_with_loans (
-            educational_level_id, year_id, demographic_id,
-            total_education_cost, loan_amount, total_loan_cost, monthly_loan_payment,
-            annual_earnings, baseline_earnings, net_monthly_earnings,
-            total_investment, earnings_premium_monthly,
-            net_roi_after_loans_10yr, debt_to_income_ratio, years_to_break_even
-          ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-          ON CONFLICT (educational_level_id, year_id, demographic_id) DO UPDATE
-          SET 
-            total_education_cost = EXCLUDED.total_education_cost,
-            loan_amount = EXCLUDED.loan_amount,
-            total_loan_cost = EXCLUDED.total_loan_cost,
-            monthly_loan_payment = EXCLUDED.monthly_loan_payment,
-            annual_earnings = EXCLUDED.annual_earnings,
-            baseline_earnings = EXCLUDED.baseline_earnings,
-            net_monthly_earnings = EXCLUDED.net_monthly_earnings,
-            total_investment = EXCLUDED.total_investment,
-            earnings_premium_monthly = EXCLUDED.earnings_premium_monthly,
-            net_roi_after_loans_10yr = EXCLUDED.net_roi_after_loans_10yr,
-            debt_to_income_ratio = EXCLUDED.debt_to_income_ratio,
-            years_to_break_even = EXCLUDED.years_to_break_even;
-        """, (
+      self.cur.execute("DROP TABLE IF EXISTS roi_staging")
+      self.cur.execute("""
+        CREATE TEMP TABLE roi_staging (
+          educational_level_id INT,
+          year_id INT,
+          demographic_id INT,
+          total_education_cost FLOAT8,
+          loan_amount FLOAT8,
+          total_loan_cost FLOAT8,
+          monthly_loan_payment FLOAT8,
+          annual_earnings FLOAT8,
+          baseline_earnings FLOAT8,
+          net_monthly_earnings FLOAT8,
+          total_investment FLOAT8,
+          earnings_premium_monthly FLOAT8,
+          net_roi_after_loans_10yr FLOAT8,
+          debt_to_income_ratio FLOAT8,
+          years_to_break_even FLOAT8
+        ) ON COMMIT DROP;
+      """)
+      self.backend.copy_columns(
+        self.cur,
+        'roi_staging',
+        ROI_COLUMNS,
+        [
           educational_level_id, year_id, demographic_id,
           total_education_cost, loan_amount, total_loan_cost, monthly_loan_payment,
           annual_earnings, baseline_earnings, net_monthly_earnings,
           total_investment, earnings_premium_monthly,
-          net_roi_after_loans_10yr, 
-          debt_to_income_ratio, years_to_break_even
-        ))
-        self.cur.execute("DELETE FROM education_roi_with_loans WHERE total_education_cost = 0")
+          net_roi_after_loans_10yr, debt_to_income_ratio, years_to_break_even
+        ],
+        ROI_COLUMN_TYPES
+      )
+
+      version = self.backend.next_value(self.cur, 'education_roi_version_seq')
+      if self.backend.dialect == 'sqlite':
+        self.merge_roi_staging_sqlite(version)
+      else:
+        self.merge_roi_staging(version)
+      self.last_version = version
         
       self.conn.commit()
+      self.cache.bump_version()
       print("ROI calculations completed successfully")
     except Exception as e:
       self.conn.rollback()
       print(f"Error calculating ROI: {str(e)}")
       raise
 
+  def merge_roi_staging(self, version):
+    """
+    Merge roi_staging into education_roi_with_loans in one statement, rewriting only
+    rows whose hash changed and logging every change under version. Stored rows whose
+    key has no costed staging row are deleted and logged as 'D'.
+    """
+    self.cur.execute("""
+      WITH merged AS (
+        INSERT INTO education_roi_with_loans (
+          educational_level_id, year_id, demographic_id,
+          total_education_cost, loan_amount, total_loan_cost, monthly_loan_payment,
+          annual_earnings, baseline_earnings, net_monthly_earnings,
+          total_investment, earnings_premium_monthly,
+          net_roi_after_loans_10yr, debt_to_income_ratio, years_to_break_even,
+          row_version, row_hash
+        )
+        SELECT
+          s.*,
+          %(version)s,
+          md5(ROW(
+            s.total_education_cost, s.loan_amount, s.total_loan_cost, s.monthly_loan_payment,
+            s.annual_earnings, s.baseline_earnings, s.net_monthly_earnings,
+            s.total_investment, s.earnings_premium_monthly,
+            s.net_roi_after_loans_10yr, s.debt_to_income_ratio, s.years_to_break_even
+          )::text)
+        FROM (
+          SELECT
+            educational_level_id, year_id, demographic_id,
+            ROUND(total_education_cost::numeric, 2) AS total_education_cost,
+            ROUND(loan_amount::numeric, 2) AS loan_amount,
+            ROUND(total_loan_cost::numeric, 2) AS total_loan_cost,
+            ROUND(monthly_loan_payment::numeric, 2) AS monthly_loan_payment,
+            ROUND(annual_earnings::numeric, 2) AS annual_earnings,
+            ROUND(baseline_earnings::numeric, 2) AS baseline_earnings,
+            ROUND(net_monthly_earnings::numeric, 2) AS net_monthly_earnings,
+            ROUND(total_investment::numeric, 2) AS total_investment,
+            ROUND(earnings_premium_monthly::numeric, 2) AS earnings_premium_monthly,
+            ROUND(net_roi_after_loans_10yr::numeric, 2) AS net_roi_after_loans_10yr,
+            ROUND(debt_to_income_ratio::numeric, 2) AS debt_to_income_ratio,
+            ROUND(years_to_break_even::numeric, 2) AS years_to_break_even
+          FROM roi_staging
+          WHERE total_education_cost <> 0
+        ) s
+        ON CONFLICT (educational_level_id, year_id, demographic_id) DO UPDATE
+        SET 
+          total_education_cost = EXCLUDED.total_education_cost,
+          loan_amount = EXCLUDED.loan_amount,
+          total_loan_cost = EXCLUDED.total_loan_cost,
+          monthly_loan_payment = EXCLUDED.monthly_loan_payment,
+          annual_earnings = EXCLUDED.annual_earnings,
+          baseline_earnings = EXCLUDED.baseline_earnings,
+          net_monthly_earnings = EXCLUDED.net_monthly_earnings,
+          total_investment = EXCLUDED.total_investment,
+          earnings_premium_monthly = EXCLUDED.earnings_premium_monthly,
+          net_roi_after_loans_10yr = EXCLUDED.net_roi_after_loans_10yr,
+          debt_to_income_ratio = EXCLUDED.debt_to_income_ratio,
+          years_to_break_even = EXCLUDED.years_to_break_even,
+          row_version = EXCLUDED.row_version,
+          row_hash = EXCLUDED.row_hash
+        WHERE education_roi_with_loans.row_hash IS DISTINCT FROM EXCLUDED.row_hash
+        RETURNING educational_level_id, year_id, demographic_id, row_hash, (xmax = 0) AS inserted
+      )
+      INSERT INTO education_roi_changelog (
+        version, operation, educational_level_id, year_id, demographic_id, row_hash
+      )
+      SELECT
+        %(version)s, CASE WHEN inserted THEN 'I' ELSE 'U' END,
+        educational_level_id, year_id, demographic_id, row_hash
+      FROM merged;
+    """, {'version': version})
+    self.cur.execute(f"""
+      WITH deleted AS (
+        DELETE FROM education_roi_with_loans WHERE {STALE_ROI_FILTER}
+        RETURNING educational_level_id, year_id, demographic_id
+      )
+      INSERT INTO education_roi_changelog (
+        version, operation, educational_level_id, year_id, demographic_id
+      )
+      SELECT %s, 'D', educational_level_id, year_id, demographic_id
+      FROM deleted;
+    """, (version,))
+
+  def merge_roi_staging_sqlite(self, version):
+    """
+    SQLite version of merge_roi_staging. SQLite has no data-modifying CTEs or xmax,
+    so the changelog is written from a hashed copy of the staging rows before the upsert.
+    """
+    metrics = ROI_COLUMNS[3:]
+    self.cur.execute("DROP TABLE IF EXISTS roi_merge")
+    self.cur.execute(f"""
+      CREATE TEMP TABLE roi_merge AS
+      SELECT
+        educational_level_id, year_id, demographic_id,
+        {', '.join(f'ROUND({column}, 2) AS {column}' for column in metrics)},
+        md5({" || '|' || ".join(f'ROUND({column}, 2)' for column in metrics)}) AS row_hash
+      FROM roi_staging
+      WHERE total_education_cost <> 0
+    """)
+    self.cur.execute("""
+      INSERT INTO education_roi_changelog (
+        version, operation, educational_level_id, year_id, demographic_id, row_hash
+      )
+      SELECT
+        %s, CASE WHEN r.roi_id IS NULL THEN 'I' ELSE 'U' END,
+        m.educational_level_id, m.year_id, m.demographic_id, m.row_hash
+      FROM roi_merge m
+      LEFT JOIN education_roi_with_loans r
+        ON r.educational_level_id = m.educational_level_id
+        AND r.year_id = m.year_id
+        AND r.demographic_id = m.demographic_id
+      WHERE r.row_hash IS NOT m.row_hash
+    """, (version,))
+    self.cur.execute(f"""
+      INSERT INTO education_roi_with_loans ({', '.join(ROI_COLUMNS)}, row_version, row_hash)
+      SELECT {', '.join(ROI_COLUMNS)}, %s, row_hash
+      FROM roi_merge
+      WHERE true
+      ON CONFLICT (educational_level_id, year_id, demographic_id) DO UPDATE
+      SET
+        {', '.join(f'{column} = excluded.{column}' for column in metrics + ('row_version', 'row_hash'))}
+      WHERE education_roi_with_loans.row_hash IS NOT excluded.row_hash
+    """, (version,))
+    self.cur.execute(f"""
+      INSERT INTO education_roi_changelog (
+        version, operation, educational_level_id, year_id, demographic_id
+      )
+      SELECT %s, 'D', educational_level_id, year_id, demographic_id
+      FROM education_roi_with_loans
+      WHERE {STALE_ROI_FILTER}
+    """, (version,))
+    self.cur.execute(f"DELETE FROM education_roi_with_loans WHERE {STALE_ROI_FILTER}")
+
+  def run_cached_query(self, query, params=None):
+    """
+    Run a read-only query through the result cache. The changelog version is read
+    before each lookup, so a recompute committed by any process invalidates the cache.
+    """
+    self.cache.sync_version(self.get_current_version())
+
+    def load():
+      self.cur.execute(query, params)
+      return self.cur.fetchall()
+    return self.cache.get_or_load(query, params, load)
+
+  def get_cache_stats(self):
+    return self.cache.stats()
+
+  def get_current_version(self):
+    """Latest version recorded in the ROI changelog, 0 if nothing has been recorded"""
+    self.cur.execute("SELECT COALESCE(MAX(version), 0) FROM education_roi_changelog")
+    return self.cur.fetchone()[0]
+
+  def stream_changes_since(self, version, batch_size=1000):
+    """
+    Yield ROI changes recorded after version, oldest first, through a server-side cursor.
+    Each change is (change_id, version, operation, educational_level_id, year_id,
+    demographic_id, row_hash, *current ROI columns). Operation is 'I', 'U' or 'D'; a
+    'T' change means the table was recreated and consumers should resync from scratch.
+    """
+    self.stream_count += 1
+    cur = self.backend.named_cursor(self.conn, f'roi_changes_{version}_{self.stream_count}', batch_size)
+    try:
+      cur.execute(f"""
+        SELECT
+          c.change_id, c.version, c.operation,
+          c.educational_level_id, c.year_id, c.demographic_id, c.row_hash,
+          {', '.join(f'r.{column}' for column in ROI_COLUMNS[3:])}
+        FROM education_roi_changelog c
+        LEFT JOIN education_roi_with_loans r
+          ON c.operation IN ('I', 'U')
+          AND r.educational_level_id = c.educational_level_id
+          AND r.year_id = c.year_id
+          AND r.demographic_id = c.demographic_id
+        WHERE c.version > %s
+        ORDER BY c.change_id
+      """, (version,))
+      for change in cur:
+        yield change
+    finally:
+      cur.close()
+
   def get_roi_summary(self):
     """Get summary with all numbers rounded to 2 decimal places"""
     try:
-      self.cur.execute("""
-        SELECT 
-          el.education_level_name,
-          r.total_education_cost,
-          ROUND(r.loan_amount::numeric, 2) AS loan_amount,
-          ROUND(r.monthly_loan_payment::numeric, 2) AS monthly_payment,
-          ROUND(r.annual_earnings::numeric, 2) AS annual_earnings,
-          ROUND(r.net_monthly_earnings::numeric, 2) AS net_monthly_earnings,
-          ROUND(r.debt_to_income_ratio * 100::numeric, 2) AS debt_to_income_percent,
-          ROUND(r.years_to_break_even::numeric, 2) AS years_to_break_even
-        FROM 
-          education_roi_with_loans r
-        JOIN 
-          dim_educational_level el ON r.educational_level_id = el.educational_level_id;
-      """)
-      results = self.cur.fetchall()
+      results = self.run_cached_query(ROI_SUMMARY_QUERY)
       return results
     except Exception as e:
       print(f"Error getting ROI summary: {str(e)}")
       raise
 
+  def create_monte_carlo_table(self):
+    """Create the table holding Monte Carlo percentile bands"""
+    try:
+      self.cur.execute("""
+        DROP TABLE IF EXISTS education_roi_monte_carlo CASCADE;
+
+        CREATE TABLE education_roi_monte_carlo (
+          monte_carlo_id SERIAL PRIMARY KEY,
+          educational_level_id INT REFERENCES dim_educational_level(educational_level_id),
+          year_id INT REFERENCES dim_year(year_id),
+          demographic_id INT REFERENCES dim_demographic(demographics_id),
+          n_draws INT,
+          seed BIGINT,
+
+          roi_percentage_p5 NUMERIC(10,2),
+          roi_percentage_p50 NUMERIC(10,2),
+          roi_percentage_p95 NUMERIC(10,2),
+          years_to_break_even_p5 NUMERIC(10,2),
+          years_to_break_even_p50 NUMERIC(10,2),
+          years_to_break_even_p95 NUMERIC(10,2),
+          debt_to_income_ratio_p5 NUMERIC(10,4),
+          debt_to_income_ratio_p50 NUMERIC(10,4),
+          debt_to_income_ratio_p95 NUMERIC(10,4),
+          never_break_even_share NUMERIC(6,4),
+
+          UNIQUE(educational_level_id, year_id, demographic_id)
+        );
+      """)
+      self.conn.commit()
+      print("Monte Carlo table created successfully")
+    except Exception as e:
+      self.conn.rollback()
+      print(f"Error creating Monte Carlo table: {str(e)}")
+      raise
+
+  def get_cost_inflation_stats(self):
+    """Mean and standard deviation of year-over-year cost growth per education level"""
+    import numpy as np
+    self.cur.execute("""
+      SELECT c.educational_level_id, c.cost
+      FROM expenditure_per_full_time_student c
+      JOIN dim_year y ON c.year_id = y.year_id
+      WHERE c.cost > 0
+      ORDER BY c.educational_level_id, y.year
+    """)
+    costs = {}
+    for educational_level_id, cost in self.cur.fetchall():
+      costs.setdefault(educational_level_id, []).append(float(cost))
+
+    stats = {}
+    for educational_level_id, series in costs.items():
+      series = np.array(series)
+      if len(series) < 2:
+        stats[educational_level_id] = (0.0, 0.0)
+        continue
+      growth = np.diff(series) / series[:-1]
+      stats[educational_level_id] = (float(growth.mean()), float(growth.std()))
+    return stats
+
+  def calculate_roi_monte_carlo(self, n_draws=100000, seed=20240101, interest_rate_std=0.01,
+                                earnings_sigma=0.25, earnings_correlation=0.8,
+                                cost_inflation_years=1, chunk_size=4, draws_per_task=25000,
+                                max_workers=None):
+    """
+    Monte Carlo uncertainty bands for the ROI metrics.
+    Keys are split into chunks of chunk_size and the draws of each chunk into blocks
+    of draws_per_task, one process pool task per (chunk, block). Each chunk gets a
+    child of SeedSequence(seed) and each block a child of its chunk's seed, so results
+    do not depend on the number of workers. The blocks of a key are combined before
+    the percentiles are taken. Bands that fall among the draws that never break even
+    are stored as NULL.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    import numpy as np
+    try:
+      self.cur.execute(ROI_INPUTS_QUERY)
+      rows = [row for row in self.cur.fetchall() if row[5]]
+      inflation_stats = self.get_cost_inflation_stats()
+
+      keys = [(row[0], row[1], row[2]) for row in rows]
+      inputs = {
+        'annual_earnings': np.array([float(row[3] or 0) for row in rows]),
+        'baseline_earnings': np.array([float(row[4] or 0) for row in rows]),
+        'total_education_cost': np.array([float(row[5]) for row in rows]),
+        'inflation_mean': np.array([inflation_stats.get(row[0], (0.0, 0.0))[0] for row in rows]),
+        'inflation_std': np.array([inflation_stats.get(row[0], (0.0, 0.0))[1] for row in rows]),
+      }
+      params = {
+        'n_draws': n_draws,
+        'interest_rate': self.interest_rate,
+        'interest_rate_std': interest_rate_std,
+        'earnings_sigma': earnings_sigma,
+        'earnings_correlation': earnings_correlation,
+        'cost_inflation_years': cost_inflation_years,
+        'loan_term_years': self.loan_term_years,
+        'loan_coverage': self.loan_coverage,
+      }
+
+      starts = range(0, len(keys), chunk_size)
+      chunks = [{name: values[i:i + chunk_size] for name, values in inputs.items()} for i in starts]
+      block_sizes = [draws_per_task] * (n_draws // draws_per_task)
+      if n_draws % draws_per_task:
+        block_sizes.append(n_draws % draws_per_task)
+      block_params = [dict(params, n_draws=size) for size in block_sizes]
+
+      tasks = []
+      for chunk, chunk_seed in zip(chunks, np.random.SeedSequence(seed).spawn(len(chunks))):
+        for block, block_seed in zip(block_params, chunk_seed.spawn(len(block_sizes))):
+          tasks.append((chunk, block, block_seed))
+
+      if max_workers == 1 or len(tasks) <= 1:
+        partials = [simulate_roi_draws(*task) for task in tasks]
+      else:
+        with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as pool:
+          partials = list(pool.map(simulate_roi_draws, *zip(*tasks)))
+
+      bands = []
+      for i in range(len(chunks)):
+        blocks = partials[i * len(block_sizes):(i + 1) * len(block_sizes)]
+        for key_blocks in zip(*blocks):
+          bands.append(roi_draw_bands({
+            name: np.concatenate([draws[name] for draws in key_blocks]) for name in MONTE_CARLO_METRICS
+          }))
+
+      columns = [f'{name}_p{pct}' for name in MONTE_CARLO_METRICS for pct in PERCENTILES]
+      columns.append('never_break_even_share')
+      values = [
+        key + (n_draws, seed) + tuple(band[col] if np.isfinite(band[col]) else None for col in columns)
+        for key, band in zip(keys, bands)
+      ]
+      self.backend.execute_values(
+        self.cur,
+        f"""
+          INSERT INTO education_roi_monte_carlo (
+            educational_level_id, year_id, demographic_id, n_draws, seed, {', '.join(columns)}
+          ) VALUES %s
+          ON CONFLICT (educational_level_id, year_id, demographic_id) DO UPDATE
+          SET
+            n_draws = EXCLUDED.n_draws,
+            seed = EXCLUDED.seed,
+            {', '.join(f'{col} = EXCLUDED.{col}' for col in columns)}
+        """,
+        values
+      )
+      self.conn.commit()
+      self.cache.bump_version()
+      print("Monte Carlo ROI bands completed successfully")
+      return dict(zip(keys, bands))
+    except Exception as e:
+      self.conn.rollback()
+      print(f"Error calculating Monte Carlo ROI: {str(e)}")
+      raise
+
 def main():
   db_params = {
     'dbname': 'your_dbname',
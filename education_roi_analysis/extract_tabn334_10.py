@@ -1,6 +1,5 @@
-import pandas as pd
-
 def explore_cost_dataframe(file_path):
+  import pandas as pd
   pd.set_option('display.max_columns', None)
   pd.set_option('display.max_rows', None)
   df = pd.read_excel(file_path)  
@@ -23,6 +22,7 @@ def split_dataframe_by_nan(df):
   """
   Split DataFrame into multiple tables based on NaN 
   """
+  import pandas as pd
   new_df = pd.DataFrame(columns=['educational_level_id','year', 'cost'])
   for row in range(df.shape[0]):
     if pd.isna(df.iloc[row,1]):
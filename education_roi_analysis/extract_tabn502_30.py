@@ -1,7 +1,7 @@
-import pandas as pd
 import re
 
 def explore_dataframe(file_path):
+  import pandas as pd
   pd.set_option('display.max_columns', None)
   pd.set_option('display.max_rows', None)
   df = pd.read_excel(file_path, skiprows=2)
@@ -17,6 +17,7 @@ def split_dataframe_by_nan_rows(df):
   Split DataFrame into multiple tables based on NaN rows
   A row is considered a split point if all columns from index 2 onwards are NaN
   """
+  import pandas as pd
   tables = []
   current_table = []
   for idx, row in df.iterrows():
@@ -53,6 +54,7 @@ def split_tables_by_marker(tables):
   Returns:
     tuple: (earnings_tables, attainment_tables)
   """
+  import pandas as pd
   earnings_tables = []
   attainment_tables = []
   
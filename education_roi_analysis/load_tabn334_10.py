@@ -1,17 +1,33 @@
-import psycopg2
-from psycopg2.extras import execute_values
-from extract_tabn334_10 import explore_cost_dataframe, split_dataframe_by_nan, get_education_level
+from db_backend import PostgresBackend
+from load_tabn502_30 import insert_years
+
+
+def cost_years(table):
+  """Distinct years of the cost table in ascending order, the order their ids are assigned in"""
+  return sorted({int(year_value) for year_value in table['year']})
+
+
+def cost_columns(table, year_ids):
+  """(educational_level_id, year_id, cost) column arrays of the cost table"""
+  import numpy as np
+  return [
+    table['educational_level_id'].to_numpy(dtype=float),
+    np.array([year_ids[int(year_value)] for year_value in table['year']], dtype=float),
+    table['cost'].to_numpy(dtype=float),
+  ]
+
 
 class CostDataLoader:
-  def __init__(self, db_params):
+  def __init__(self, db_params, backend=None):
     self.db_params = db_params
+    self.backend = backend or PostgresBackend(db_params)
     self.conn = None
     self.cur = None
 
   def connect(self):
     try:
-      self.conn = psycopg2.connect(**self.db_params)
-      self.cur = self.conn.cursor()
+      self.conn = self.backend.connect()
+      self.cur = self.backend.cursor(self.conn)
       print("Database connection established")
     except Exception as e:
       print(f"Error connecting to database: {str(e)}")
@@ -50,26 +66,17 @@ class CostDataLoader:
  
   def load_data(self, file_path):
     """Load data from Excel file into database tables using optimized row/column mapping"""
+    from extract_tabn334_10 import explore_cost_dataframe, split_dataframe_by_nan
     df = explore_cost_dataframe(file_path)
     table = split_dataframe_by_nan(df)
-    for row_idx in range(0, len(table)):
-      education_level_id = table.iloc[row_idx,0]
-      year_value = table.iloc[row_idx,1]
-      self.cur.execute(
-        "INSERT INTO dim_year (year) VALUES (%s) ON CONFLICT (year) DO NOTHING",
-        (int(year_value),)
-      )
-      self.cur.execute(
-        "SELECT year_id FROM dim_year WHERE year = %s",
-        (int(year_value),)
-      )
-      year_id = self.cur.fetchone()[0]
-      cost = table.iloc[row_idx,2]
-      self.cur.execute("""
-          INSERT INTO Expenditure_per_full_time_student 
-          (educational_level_id, year_id, cost)
-          VALUES (%s, %s, %s)
-      """, (int(education_level_id), year_id, float(cost)))
+    year_ids = insert_years(self.backend, self.cur, cost_years(table))
+    self.backend.copy_columns(
+      self.cur,
+      'Expenditure_per_full_time_student',
+      ('educational_level_id', 'year_id', 'cost'),
+      cost_columns(table, year_ids),
+      ('int4', 'int4', 'float8')
+    )
 
     self.conn.commit()
     print("Data loaded successfully")
@@ -1,18 +1,160 @@
-import pandas as pd
-import psycopg2
-from psycopg2.extras import execute_values
-from extract_tabn502_30 import explore_dataframe, explore_and_split_excel
+from db_backend import PostgresBackend
+
+EDUCATION_LEVELS = [
+  ('Less than high school completion', 1),
+  ('High school completion', 2),
+  ('Some college, no degree', 3),
+  ('Associate degree', 4),
+  ('Median annual earnings, all education levels', 5),
+  ("Bachelor's degree", 6),
+  ("Bachelor's degree or higher", 7),
+  ("Master's or higher degree", 8)
+]
+RACE_ETHNICITY_VALUES = [
+  ('Asian', 'A'),
+  ('Black', 'B'),
+  ('Hispanic', 'H'),
+  ('White', 'W'),
+  ('Union', 'U')
+]
+GENDER_VALUES = [
+  ('Female', 'F'),
+  ('Male', 'M'),
+  ('All', 'A')
+]
+
+EARNINGS_COLUMNS = ('educational_level_id', 'demographic_id', 'year_id', 'annual_earnings')
+ATTAINMENT_COLUMNS = ('educational_level_id', 'demographic_id', 'year_id', 'percentage')
+FACT_COLUMN_TYPES = ('int4', 'int4', 'int4', 'float8')
+
+
+# Surrogate ids are assigned here rather than by SERIAL columns, so the PostgreSQL and
+# SQLite loaders and the Parquet engine agree on them (the ROI queries hard-code
+# year_id 13 and demographic_id 15)
+def with_ids(values):
+  """Dimension rows prefixed with their id, numbered from 1 in list order"""
+  return [(idx + 1, *value) for idx, value in enumerate(values)]
+
+
+def demographic_rows():
+  """(demographics_id, gender_id, race_ethnicity_id) for every gender x race pair, gender first"""
+  n_races = len(RACE_ETHNICITY_VALUES)
+  return [
+    (gender_idx * n_races + race_idx + 1, gender_idx + 1, race_idx + 1)
+    for gender_idx in range(len(GENDER_VALUES))
+    for race_idx in range(n_races)
+  ]
+
+
+def demographic_ids_by_code():
+  """Map every (gender_code, race_code) pair to its demographics_id"""
+  return {
+    (GENDER_VALUES[gender_id - 1][1], RACE_ETHNICITY_VALUES[race_id - 1][1]): demographics_id
+    for demographics_id, gender_id, race_id in demographic_rows()
+  }
+
+
+def earnings_years(df):
+  """Years of the earnings workbook, in column order"""
+  return [int(col) for col in df.columns[1:] if str(col).isdigit()]
+
+
+def assign_year_ids(years, year_ids=None):
+  """
+  Extend a year -> year_id mapping with the years it does not contain yet,
+  numbered after its highest id in the order given.
+  """
+  year_ids = dict(year_ids or {})
+  next_id = max(year_ids.values(), default=0) + 1
+  for year in years:
+    if year not in year_ids:
+      year_ids[year] = next_id
+      next_id += 1
+  return year_ids
+
+
+def insert_years(backend, cur, years):
+  """Insert the years missing from dim_year with ids from assign_year_ids, return year -> year_id"""
+  cur.execute("SELECT year, year_id FROM dim_year")
+  existing = dict(cur.fetchall())
+  year_ids = assign_year_ids(years, existing)
+  backend.execute_values(
+    cur,
+    "INSERT INTO dim_year (year_id, year) VALUES %s",
+    [(year_ids[year], year) for year in dict.fromkeys(years) if year not in existing]
+  )
+  return year_ids
+
+
+def block_to_columns(table, first_row, demographic_id, year_mapping):
+  """
+  Melt one demographic block into long fact columns as NumPy arrays.
+  Missing values become 0 and unmapped education levels become NULL (NaN).
+  """
+  import numpy as np
+  import pandas as pd
+  labels = table.iloc[first_row:, 0]
+  values = table.iloc[first_row:, 1:].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+  n_rows, n_cols = values.shape
+  education_level_ids = np.array(
+    [EducationDataLoader.map_education_level(label) for label in labels], dtype=float
+  )
+  year_ids = np.array([year_mapping[col_idx] for col_idx in range(n_cols)], dtype=float)
+  return [
+    np.repeat(education_level_ids, n_cols),
+    np.full(n_rows * n_cols, demographic_id, dtype=float),
+    np.tile(year_ids, n_rows),
+    np.nan_to_num(values.ravel(), nan=0.0),
+  ]
+
+
+_worker_copy_writer = None
+
+
+def worker_copy_writer():
+  """One BinaryCopyWriter per worker process, so its buffer is reused across blocks"""
+  global _worker_copy_writer
+  if _worker_copy_writer is None:
+    from copy_writer import BinaryCopyWriter
+    _worker_copy_writer = BinaryCopyWriter()
+  return _worker_copy_writer
+
+
+def transform_block_pair(earnings_table, attainment_table, year_mapping, demographic_ids, encode=True):
+  """
+  Turn one (earnings, attainment) block pair into binary COPY bodies, or into long
+  fact columns when encode is False (for backends without binary COPY).
+  Runs in a worker process, so the demographic is parsed here and resolved through
+  the demographic_ids mapping instead of a database lookup.
+  """
+  demographic_info = earnings_table.iloc[0, 0]
+  gender_code, race_code = EducationDataLoader.parse_demographic_info(demographic_info)
+  demographic_id = demographic_ids.get((gender_code, race_code))
+  if demographic_id is None:
+    raise ValueError(f"No demographic ID found for gender '{gender_code}' and race '{race_code}'")
+
+  earnings_columns = block_to_columns(earnings_table, 1, demographic_id, year_mapping)
+  attainment_columns = block_to_columns(attainment_table, 0, demographic_id, year_mapping)
+  if not encode:
+    return earnings_columns, attainment_columns
+
+  writer = worker_copy_writer()
+  earnings_body = writer.encode(earnings_columns, FACT_COLUMN_TYPES, header=False, trailer=False).tobytes()
+  attainment_body = writer.encode(attainment_columns, FACT_COLUMN_TYPES, header=False, trailer=False).tobytes()
+  return earnings_body, attainment_body
+
 
 class EducationDataLoader:
-  def __init__(self, db_params):
+  def __init__(self, db_params, backend=None):
     self.db_params = db_params
+    self.backend = backend or PostgresBackend(db_params)
     self.conn = None
     self.cur = None
 
   def connect(self):
     try:
-      self.conn = psycopg2.connect(**self.db_params)
-      self.cur = self.conn.cursor()
+      self.conn = self.backend.connect()
+      self.cur = self.backend.cursor(self.conn)
       print("Database connection established")
     except Exception as e:
       print(f"Error connecting to database: {str(e)}")
@@ -101,14 +243,8 @@ class EducationDataLoader:
   def insert_year_data(self, df):
     """Insert years from DataFrame into dim_year table"""
     try:
-      years = [int(col) for col in df.columns[1:] if str(col).isdigit()]
-      year_values = [(year,) for year in years]
-      
-      execute_values(
-        self.cur,
-        "INSERT INTO dim_year (year) VALUES %s ON CONFLICT (year) DO NOTHING",
-        year_values
-      )
+      years = earnings_years(df)
+      insert_years(self.backend, self.cur, years)
       
       print("Years inserted successfully")
       return years
@@ -117,24 +253,12 @@ class EducationDataLoader:
       raise
 
   def insert_demographic_combinations(self):
-    """Insert demographic combinations by cross joining gender and race"""
+    """Insert demographic combinations, the cross join of gender and race"""
     try:
-      self.cur.execute("""
-          WITH gender_race AS (
-              SELECT g.gender_id, r.race_ethnicity_id
-              FROM gender_table g
-              CROSS JOIN race_ethnicity r
-          )
-          SELECT gender_id, race_ethnicity_id 
-          FROM gender_race
-      """)
-      
-      demographic_values = [(g_id, r_id) for g_id, r_id in self.cur.fetchall()]
-      
-      execute_values(
+      self.backend.execute_values(
         self.cur,
-        "INSERT INTO dim_demographic (gender_id, race_ethnicity_id) VALUES %s ON CONFLICT (gender_id, race_ethnicity_id) DO NOTHING",
-        demographic_values
+        "INSERT INTO dim_demographic (demographics_id, gender_id, race_ethnicity_id) VALUES %s ON CONFLICT (gender_id, race_ethnicity_id) DO NOTHING",
+        demographic_rows()
       )
 
       self.conn.commit()
@@ -148,20 +272,11 @@ class EducationDataLoader:
   def insert_education_level_data(self):
     """Insert education levels into dim_educational_level table"""
     try:
-      education_levels = [
-        ('Less than high school completion', 1),
-        ('High school completion', 2),
-        ('Some college, no degree', 3),
-        ('Associate degree', 4),
-        ('Median annual earnings, all education levels', 5),
-        ("Bachelor's degree", 6),
-        ("Bachelor's degree or higher", 7),
-        ("Master's or higher degree", 8)
-      ]
+      education_levels = with_ids(EDUCATION_LEVELS)
       
-      execute_values(
+      self.backend.execute_values(
         self.cur,
-        "INSERT INTO dim_educational_level (education_level_name, education_level_order) VALUES %s",
+        "INSERT INTO dim_educational_level (educational_level_id, education_level_name, education_level_order) VALUES %s",
         education_levels
       )
       
@@ -173,17 +288,11 @@ class EducationDataLoader:
   def insert_race_ethnicity_data(self):
     """Insert race and ethnicity data into race_ethnicity table"""
     try:
-      race_ethnicity_values = [
-        ('Asian', 'A'),
-        ('Black', 'B'),
-        ('Hispanic', 'H'),
-        ('White', 'W'),
-        ('Union', 'U')
-      ]
+      race_ethnicity_values = with_ids(RACE_ETHNICITY_VALUES)
       
-      execute_values(
+      self.backend.execute_values(
         self.cur,
-        "INSERT INTO race_ethnicity (race_ethnicity_name, race_ethnicity_code) VALUES %s",
+        "INSERT INTO race_ethnicity (race_ethnicity_id, race_ethnicity_name, race_ethnicity_code) VALUES %s",
         race_ethnicity_values
       )
       
@@ -195,15 +304,11 @@ class EducationDataLoader:
   def insert_gender_data(self):
     """Insert gender data into gender_table"""
     try:
-      gender_values = [
-        ('Female', 'F'),
-        ('Male', 'M'),
-        ('All', 'A')
-      ]
+      gender_values = with_ids(GENDER_VALUES)
       
-      execute_values(
+      self.backend.execute_values(
         self.cur,
-        "INSERT INTO gender_table (gender_name, gender_code) VALUES %s",
+        "INSERT INTO gender_table (gender_id, gender_name, gender_code) VALUES %s",
         gender_values
       )
       
@@ -227,6 +332,29 @@ class EducationDataLoader:
       print(f"Error inserting dimension data: {str(e)}")
       raise
 
+  def get_year_mapping(self, all_years):
+    """Map each year column index to its dim_year id"""
+    year_mapping = {}
+    for col_idx in range(0, len(all_years)):
+      year_value = all_years[col_idx]
+      self.cur.execute(
+        "SELECT year_id FROM dim_year WHERE year = %s",
+        (int(year_value),)
+      )
+      year_id = self.cur.fetchone()[0]
+      year_mapping[col_idx] = year_id
+    return year_mapping
+
+  def get_demographic_ids(self):
+    """Map every (gender_code, race_code) pair to its demographics_id in one query"""
+    self.cur.execute("""
+        SELECT g.gender_code, r.race_ethnicity_code, d.demographics_id
+        FROM dim_demographic d
+        JOIN gender_table g ON d.gender_id = g.gender_id
+        JOIN race_ethnicity r ON d.race_ethnicity_id = r.race_ethnicity_id
+    """)
+    return {(gender_code, race_code): demographics_id for gender_code, race_code, demographics_id in self.cur.fetchall()}
+
   def get_demographic_id(self, gender_code, race_code):
     self.cur.execute("""
         SELECT d.demographics_id
@@ -242,8 +370,10 @@ class EducationDataLoader:
     else:
       raise ValueError(f"No demographic ID found for gender '{gender_code}' and race '{race_code}'")
 
-  def map_education_level(self, value):
-    if pd.isna(value) or not isinstance(value, str):
+  @staticmethod
+  def map_education_level(value):
+    # Missing cells (NaN, pd.NA, None) are not strings, so no pandas check is needed
+    if not isinstance(value, str):
       return None
 
     value_lower = value.lower()
@@ -275,11 +405,12 @@ class EducationDataLoader:
 
     return None
 
-  def parse_demographic_info(self, demographic_info):
+  @staticmethod
+  def parse_demographic_info(demographic_info):
     gender_code = 'A'  
     race_code = 'U'    
     
-    if pd.notna(demographic_info):
+    if isinstance(demographic_info, str):
       if 'Total' in demographic_info:
         gender_code = 'A'
         race_code = 'U'
@@ -306,61 +437,76 @@ class EducationDataLoader:
 
 
   def load_data(self, file_path):
+    import numpy as np
+    from extract_tabn502_30 import explore_dataframe, explore_and_split_excel
     df = explore_dataframe(file_path)
     earnings_tables, attainment_tables = explore_and_split_excel(df)
     all_years = self.insert_year_data(df)
-    year_mapping = {}
-    for col_idx in range(0, len(all_years)):
-      year_value = all_years[col_idx]
-      self.cur.execute(
-        "SELECT year_id FROM dim_year WHERE year = %s",
-        (int(year_value),)
-      )
-      year_id = self.cur.fetchone()[0]
-      year_mapping[col_idx] = year_id
+    year_mapping = self.get_year_mapping(all_years)
+    earnings_blocks = []
+    attainment_blocks = []
     for table_idx in range(0,len(attainment_tables)):
       earnings_table = earnings_tables[table_idx]
       attainment_table = attainment_tables[table_idx]
       demographic_info = earnings_table.iloc[0, 0]
       gender_code, race_code = self.parse_demographic_info(demographic_info)
       demographic_id = self.get_demographic_id(gender_code, race_code)
-      for row_idx in range(1,len(earnings_table)):
-        value = earnings_table.iloc[row_idx, 0]  
-        education_level_id = self.map_education_level(value)
-        earnings_row = earnings_table.iloc[row_idx, 1:]        
-        for col_idx in range(len(earnings_row)):
-          year_id = year_mapping[col_idx]
-          earnings_value = earnings_row.iloc[col_idx]
-          if pd.notna(earnings_value):
-            earnings_value = float(earnings_value)
-          else:
-            earnings_value = 0
-          self.cur.execute("""
-              INSERT INTO Median_annual_earnings 
-              (educational_level_id, demographic_id, year_id, annual_earnings)
-              VALUES (%s, %s, %s, %s)
-          """, (education_level_id, demographic_id, year_id, earnings_value))
-      for row_idx in range(len(attainment_table)):
-        value = attainment_table.iloc[row_idx, 0]
-        education_level_id = self.map_education_level(value)
-        attainment_row = None
-        attainment_row = attainment_table.iloc[row_idx,1:]
-        for col_idx in range(len(attainment_row)):
-          year_id = year_mapping[col_idx]
-          attainment_value = attainment_row.iloc[col_idx]
-          if pd.notna(attainment_value):
-            attainment_value = float(attainment_value)
-          else:
-            attainment_value = 0
-          self.cur.execute("""
-              INSERT INTO educational_attainment 
-              (educational_level_id, demographic_id, year_id, percentage)
-              VALUES (%s, %s, %s, %s)
-          """, (education_level_id, demographic_id, year_id, attainment_value))
+      earnings_blocks.append(block_to_columns(earnings_table, 1, demographic_id, year_mapping))
+      attainment_blocks.append(block_to_columns(attainment_table, 0, demographic_id, year_mapping))
+
+    for table_name, columns, blocks in (
+      ('Median_annual_earnings', EARNINGS_COLUMNS, earnings_blocks),
+      ('educational_attainment', ATTAINMENT_COLUMNS, attainment_blocks),
+    ):
+      if blocks:
+        long_columns = [np.concatenate(parts) for parts in zip(*blocks)]
+        self.backend.copy_columns(self.cur, table_name, columns, long_columns, FACT_COLUMN_TYPES)
 
     self.conn.commit()
     print("Data loaded successfully")
 
+  def load_data_parallel(self, file_path, max_workers=None):
+    """
+    Transform each (earnings, attainment) block pair in a process pool and COPY the
+    resulting binary buffers through this single connection.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    import numpy as np
+    from extract_tabn502_30 import explore_dataframe, explore_and_split_excel
+    try:
+      df = explore_dataframe(file_path)
+      earnings_tables, attainment_tables = explore_and_split_excel(df)
+      all_years = self.insert_year_data(df)
+      year_mapping = self.get_year_mapping(all_years)
+      demographic_ids = self.get_demographic_ids()
+
+      n_blocks = len(attainment_tables)
+      with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        buffers = list(pool.map(
+          transform_block_pair,
+          earnings_tables[:n_blocks],
+          attainment_tables,
+          [year_mapping] * n_blocks,
+          [demographic_ids] * n_blocks,
+          [self.backend.supports_binary_copy] * n_blocks
+        ))
+
+      for table_name, columns, blocks in (
+        ('Median_annual_earnings', EARNINGS_COLUMNS, [earnings for earnings, _ in buffers]),
+        ('educational_attainment', ATTAINMENT_COLUMNS, [attainment for _, attainment in buffers]),
+      ):
+        if self.backend.supports_binary_copy:
+          self.backend.copy_buffers(self.cur, table_name, columns, blocks)
+        elif blocks:
+          long_columns = [np.concatenate(parts) for parts in zip(*blocks)]
+          self.backend.copy_columns(self.cur, table_name, columns, long_columns, FACT_COLUMN_TYPES)
+      self.conn.commit()
+      print(f"Data loaded successfully from {n_blocks} demographic blocks")
+    except Exception as e:
+      self.conn.rollback()
+      print(f"Error loading data in parallel: {str(e)}")
+      raise
+
 
 def main():
   db_params = {
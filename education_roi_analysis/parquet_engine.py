@@ -0,0 +1,253 @@
+import os
+from education_roi_with_loans import LoanROICalculator, ROI_COLUMNS, ROI_SUMMARY_QUERY
+
+PARQUET_TABLES = (
+  'dim_year',
+  'dim_educational_level',
+  'dim_demographic',
+  'Median_annual_earnings',
+  'educational_attainment',
+  'expenditure_per_full_time_student',
+)
+
+
+class ParquetROIEngine:
+  """
+  Run the ROI calculation in-process with DuckDB over Parquet files instead of PostgreSQL.
+  export_parquet() writes the cleaned extraction output with the same surrogate ids the
+  PostgreSQL loaders assign, and calculate_roi_with_loans() evaluates the baseline join,
+  cost join and loan metrics as one multi-threaded DuckDB query.
+  """
+
+  def __init__(self, data_dir, calculator=None, threads=None):
+    self.data_dir = data_dir
+    self.calculator = calculator or LoanROICalculator(None)
+    self.threads = threads or os.cpu_count()
+    self.conn = None
+
+  def connect(self):
+    import duckdb
+    try:
+      self.conn = duckdb.connect()
+      self.conn.execute(f"SET threads = {int(self.threads)}")
+      print("DuckDB connection established")
+    except Exception as e:
+      print(f"Error connecting to DuckDB: {str(e)}")
+      raise
+
+  def disconnect(self):
+    if self.conn:
+      self.conn.close()
+      print("DuckDB connection closed")
+
+  def parquet_path(self, table_name):
+    return os.path.join(self.data_dir, f'{table_name.lower()}.parquet')
+
+  def parquet_literal(self, table_name):
+    """parquet_path as a quoted SQL string literal, for statements that take no parameters"""
+    return "'" + self.parquet_path(table_name).replace("'", "''") + "'"
+
+  def write_parquet(self, table_name, frame):
+    self.conn.register('parquet_export', frame)
+    try:
+      self.conn.execute(
+        f"COPY (SELECT * FROM parquet_export) TO {self.parquet_literal(table_name)} (FORMAT parquet)"
+      )
+    finally:
+      self.conn.unregister('parquet_export')
+
+  def export_parquet(self, earnings_file_path, cost_file_path):
+    """
+    Extract both workbooks and write every table used by the ROI query to Parquet.
+    Surrogate ids come from the same helpers the loaders use, applied in the loaders'
+    order: earnings years first, then the cost years.
+    """
+    import numpy as np
+    import pandas as pd
+    from extract_tabn334_10 import explore_cost_dataframe, split_dataframe_by_nan
+    from extract_tabn502_30 import explore_dataframe, explore_and_split_excel
+    from load_tabn334_10 import cost_columns, cost_years
+    from load_tabn502_30 import (
+      EducationDataLoader, block_to_columns, assign_year_ids, demographic_ids_by_code,
+      demographic_rows, earnings_years, with_ids, EDUCATION_LEVELS, EARNINGS_COLUMNS,
+      ATTAINMENT_COLUMNS
+    )
+    try:
+      os.makedirs(self.data_dir, exist_ok=True)
+      df = explore_dataframe(earnings_file_path)
+      earnings_tables, attainment_tables = explore_and_split_excel(df)
+      cost_table = split_dataframe_by_nan(explore_cost_dataframe(cost_file_path))
+
+      years = earnings_years(df)
+      year_ids = assign_year_ids(cost_years(cost_table), assign_year_ids(years))
+      year_mapping = {col_idx: year_ids[year] for col_idx, year in enumerate(years)}
+      demographic_ids = demographic_ids_by_code()
+
+      earnings_blocks = []
+      attainment_blocks = []
+      for table_idx in range(len(attainment_tables)):
+        gender_code, race_code = EducationDataLoader.parse_demographic_info(earnings_tables[table_idx].iloc[0, 0])
+        demographic_id = demographic_ids[(gender_code, race_code)]
+        earnings_blocks.append(block_to_columns(earnings_tables[table_idx], 1, demographic_id, year_mapping))
+        attainment_blocks.append(block_to_columns(attainment_tables[table_idx], 0, demographic_id, year_mapping))
+
+      def fact_frame(columns, long_columns):
+        frame = pd.DataFrame(dict(zip(columns, long_columns)))
+        for column in columns[:-1]:
+          frame[column] = frame[column].astype('Int32')
+        return frame
+
+      def concat_blocks(blocks):
+        return [np.concatenate(parts) for parts in zip(*blocks)]
+
+      frames = {
+        'dim_year': pd.DataFrame(
+          sorted((year_id, year) for year, year_id in year_ids.items()), columns=['year_id', 'year']
+        ),
+        'dim_educational_level': pd.DataFrame(
+          with_ids(EDUCATION_LEVELS),
+          columns=['educational_level_id', 'education_level_name', 'education_level_order']
+        ),
+        'dim_demographic': pd.DataFrame(demographic_rows(), columns=['demographics_id', 'gender_id', 'race_ethnicity_id']),
+        'Median_annual_earnings': fact_frame(EARNINGS_COLUMNS, concat_blocks(earnings_blocks)),
+        'educational_attainment': fact_frame(ATTAINMENT_COLUMNS, concat_blocks(attainment_blocks)),
+        'expenditure_per_full_time_student': fact_frame(
+          ('educational_level_id', 'year_id', 'cost'), cost_columns(cost_table, year_ids)
+        ),
+      }
+      for table_name, frame in frames.items():
+        self.write_parquet(table_name, frame)
+      print(f"Parquet files written to {self.data_dir}")
+    except Exception as e:
+      print(f"Error exporting Parquet files: {str(e)}")
+      raise
+
+  def register_views(self):
+    """Expose each Parquet file under the PostgreSQL table name"""
+    for table_name in PARQUET_TABLES:
+      self.conn.execute(
+        f"CREATE OR REPLACE VIEW {table_name} AS SELECT * FROM read_parquet({self.parquet_literal(table_name)})"
+      )
+
+  def calculate_roi_with_loans(self, demographic_id=15, cost_year_id=13):
+    """
+    Same metrics as LoanROICalculator.calculate_roi_with_loans, computed in DuckDB.
+    Pass None for demographic_id or cost_year_id to recompute the full cartesian set.
+    Writes education_roi_with_loans.parquet and returns the rows as a DataFrame.
+    """
+    calculator = self.calculator
+    try:
+      self.register_views()
+      filters = ['e.annual_earnings > 0']
+      if demographic_id is not None:
+        filters.append(f'e.demographic_id = {int(demographic_id)}')
+      cost_filter = f'WHERE year_id = {int(cost_year_id)}' if cost_year_id is not None else ''
+      query = f"""
+        WITH BaselineEarnings AS (
+          SELECT
+            year_id,
+            demographic_id,
+            ROUND(annual_earnings, 2) AS hs_annual_earnings
+          FROM Median_annual_earnings
+          WHERE educational_level_id = 2
+        ),
+        CostData AS (
+          SELECT educational_level_id, year_id, ROUND(cost, 2) AS total_education_cost
+          FROM expenditure_per_full_time_student
+          {cost_filter}
+        ),
+        Inputs AS (
+          SELECT
+            e.educational_level_id,
+            e.year_id,
+            e.demographic_id,
+            ROUND(e.annual_earnings, 2) AS annual_earnings,
+            COALESCE(b.hs_annual_earnings, 0) AS baseline_earnings,
+            COALESCE(c.total_education_cost, 0) AS total_education_cost
+          FROM Median_annual_earnings e
+          LEFT JOIN BaselineEarnings b
+            ON e.year_id = b.year_id
+            AND e.demographic_id = b.demographic_id
+          LEFT JOIN CostData c
+            ON e.educational_level_id = c.educational_level_id
+            AND e.year_id = c.year_id
+          WHERE {' AND '.join(filters)}
+        ),
+        Loans AS (
+          SELECT
+            *,
+            total_education_cost * {calculator.loan_coverage} AS loan_amount,
+            CASE WHEN {calculator.interest_rate} = 0
+              THEN total_education_cost * {calculator.loan_coverage} / {calculator.loan_term_years * 12}
+              ELSE total_education_cost * {calculator.loan_coverage}
+                * ({calculator.interest_rate / 12} * power(1 + {calculator.interest_rate / 12}, {calculator.loan_term_years * 12}))
+                / (power(1 + {calculator.interest_rate / 12}, {calculator.loan_term_years * 12}) - 1)
+            END AS monthly_loan_payment
+          FROM Inputs
+          WHERE total_education_cost <> 0
+        ),
+        Metrics AS (
+          SELECT
+            *,
+            ROUND(monthly_loan_payment * {calculator.loan_term_years * 12}, 2) AS total_loan_cost,
+            annual_earnings / 12 - monthly_loan_payment AS net_monthly_earnings,
+            (annual_earnings - baseline_earnings) / 12 AS earnings_premium_monthly,
+            total_education_cost + ROUND(monthly_loan_payment * {calculator.loan_term_years * 12}, 2) - loan_amount
+              AS total_investment
+          FROM Loans
+        )
+        SELECT
+          educational_level_id, year_id, demographic_id,
+          ROUND(total_education_cost, 2) AS total_education_cost,
+          ROUND(loan_amount, 2) AS loan_amount,
+          ROUND(total_loan_cost, 2) AS total_loan_cost,
+          ROUND(monthly_loan_payment, 2) AS monthly_loan_payment,
+          ROUND(annual_earnings, 2) AS annual_earnings,
+          ROUND(baseline_earnings, 2) AS baseline_earnings,
+          ROUND(net_monthly_earnings, 2) AS net_monthly_earnings,
+          ROUND(total_investment, 2) AS total_investment,
+          ROUND(earnings_premium_monthly, 2) AS earnings_premium_monthly,
+          ROUND(annual_earnings * 10 - total_investment, 2) AS net_roi_after_loans_10yr,
+          ROUND(CASE WHEN annual_earnings > 0
+            THEN monthly_loan_payment * 12 / annual_earnings ELSE 0 END, 2) AS debt_to_income_ratio,
+          ROUND(CASE WHEN baseline_earnings <> 0 AND annual_earnings > baseline_earnings
+            THEN total_investment / (annual_earnings - baseline_earnings) ELSE 0 END, 2) AS years_to_break_even
+        FROM Metrics
+        ORDER BY educational_level_id, year_id, demographic_id
+      """
+      self.conn.execute(f"CREATE OR REPLACE TABLE education_roi_with_loans AS {query}")
+      self.conn.execute(
+        f"COPY education_roi_with_loans TO {self.parquet_literal('education_roi_with_loans')} (FORMAT parquet)"
+      )
+      results = self.conn.execute(f"SELECT {', '.join(ROI_COLUMNS)} FROM education_roi_with_loans").df()
+      print(f"ROI calculations completed successfully for {len(results)} rows")
+      return results
+    except Exception as e:
+      print(f"Error calculating ROI with DuckDB: {str(e)}")
+      raise
+
+  def get_roi_summary(self):
+    """Run the PostgreSQL summary query unchanged against the DuckDB tables"""
+    try:
+      return self.conn.execute(ROI_SUMMARY_QUERY).fetchall()
+    except Exception as e:
+      print(f"Error getting ROI summary: {str(e)}")
+      raise
+
+
+def main():
+  engine = ParquetROIEngine('parquet')
+
+  try:
+    engine.connect()
+    engine.export_parquet('tabn502_30.xlsx', 'tabn334_10.xlsx')
+    engine.calculate_roi_with_loans()
+    for row in engine.get_roi_summary():
+      print(row)
+  except Exception as e:
+    print(f"Error in main execution: {str(e)}")
+  finally:
+    engine.disconnect()
+
+if __name__ == "__main__":
+  main()
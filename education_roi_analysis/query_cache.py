@@ -0,0 +1,83 @@
+import time
+from collections import OrderedDict
+
+
+class QueryCache:
+  """
+  Read-through cache for query results keyed by (version, query, params).
+  Entries expire after ttl_seconds, the least recently used entry is evicted
+  once max_entries is reached, and bump_version() invalidates everything.
+  sync_version() invalidates when a version stored with the data has moved, which
+  also catches writes made by other processes.
+  """
+
+  def __init__(self, ttl_seconds=300, max_entries=128, clock=time.monotonic):
+    self.ttl_seconds = ttl_seconds
+    self.max_entries = max_entries
+    self.clock = clock
+    self.version = 0
+    self.source_version = None
+    self.entries = OrderedDict()
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+    self.expirations = 0
+
+  def make_key(self, query, params=None):
+    if isinstance(params, dict):
+      params = tuple(sorted(params.items()))
+    elif isinstance(params, list):
+      params = tuple(params)
+    return (self.version, query, params)
+
+  def get_or_load(self, query, params, loader):
+    """Return the cached result for query/params, calling loader() on a miss"""
+    key = self.make_key(query, params)
+    entry = self.entries.get(key)
+    now = self.clock()
+    if entry is not None:
+      stored_at, result = entry
+      if self.ttl_seconds is None or now - stored_at < self.ttl_seconds:
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return list(result)
+      del self.entries[key]
+      self.expirations += 1
+
+    self.misses += 1
+    result = tuple(loader())
+    self.entries[key] = (now, result)
+    self.entries.move_to_end(key)
+    while len(self.entries) > self.max_entries:
+      self.entries.popitem(last=False)
+      self.evictions += 1
+    return list(result)
+
+  def bump_version(self):
+    """Invalidate all cached results, called after the underlying data is committed"""
+    self.version += 1
+    self.entries.clear()
+    return self.version
+
+  def sync_version(self, source_version):
+    """Invalidate all cached results if source_version differs from the last one seen"""
+    if source_version != self.source_version:
+      self.source_version = source_version
+      self.bump_version()
+    return self.version
+
+  def clear(self):
+    self.entries.clear()
+
+  def stats(self):
+    lookups = self.hits + self.misses
+    return {
+      'version': self.version,
+      'source_version': self.source_version,
+      'entries': len(self.entries),
+      'hits': self.hits,
+      'misses': self.misses,
+      'evictions': self.evictions,
+      'expirations': self.expirations,
+      'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+    }
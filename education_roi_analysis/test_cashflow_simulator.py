@@ -0,0 +1,97 @@
+import math
+
+import pytest
+
+np = pytest.importorskip('numpy')
+from cashflow_simulator import (
+  REPAYMENT_PLANS, CashFlowSimulator, break_even_year, income_driven_repayment_schedule,
+  internal_rate_of_return, net_present_value, standard_repayment_schedule
+)
+from education_roi_with_loans import LoanROICalculator
+
+
+def test_npv_at_zero_rate_is_the_sum_of_cash_flows():
+  cash_flows = np.array([[-100.0, 30, 40, 50], [-10.0, 0, 0, 5]])
+  assert net_present_value(cash_flows, 0.0) == pytest.approx([20.0, -5.0])
+
+
+def test_npv_discounts_each_year():
+  cash_flows = np.array([[0.0, 110, 121]])
+  assert net_present_value(cash_flows, 0.10) == pytest.approx([200.0])
+
+
+def test_irr_of_a_par_bond_is_its_coupon():
+  cash_flows = np.array([[-100.0, 10, 10, 10, 110]])
+  assert internal_rate_of_return(cash_flows) == pytest.approx([0.10], abs=1e-9)
+
+
+def test_irr_is_nan_without_a_sign_change():
+  cash_flows = np.array([[100.0, 10, 10], [-100.0, 10, 10]])
+  irr = internal_rate_of_return(cash_flows)
+  assert math.isnan(irr[0])
+  assert irr[1] < 0
+
+
+def test_break_even_year():
+  cash_flows = np.array([
+    [-100.0, 60, 60, 60],
+    [-100.0, -10, -10, -10],
+  ])
+  years = break_even_year(cash_flows, 0.0)
+  assert years[0] == 2
+  assert math.isnan(years[1])
+
+
+def test_standard_schedule_pays_for_the_term_only():
+  payments = standard_repayment_schedule(np.array([12000.0]), 0.0, 10, 15)
+  assert payments[0, 0] == 0
+  assert payments[0, 1:11] == pytest.approx([1200.0] * 10)
+  assert payments[0, 11:].sum() == 0
+
+
+def test_income_driven_pays_nothing_below_the_threshold():
+  earnings = np.full((1, 6), 20000.0)
+  payments = income_driven_repayment_schedule(
+    np.array([10000.0]), earnings, 0.05, 0.10, 15060, 1.5, 20
+  )
+  assert payments.sum() == 0
+
+
+def test_income_driven_stops_after_forgiveness():
+  earnings = np.full((1, 31), 100000.0)
+  payments = income_driven_repayment_schedule(
+    np.array([1000000.0]), earnings, 0.05, 0.10, 15060, 1.5, 20
+  )
+  expected = 0.10 * (100000.0 - 1.5 * 15060)
+  assert payments[0, 1:21] == pytest.approx([expected] * 20)
+  assert payments[0, 21:].sum() == 0
+
+
+def test_income_driven_stops_when_the_balance_is_repaid():
+  earnings = np.full((1, 11), 100000.0)
+  payments = income_driven_repayment_schedule(
+    np.array([10000.0]), earnings, 0.0, 0.10, 15060, 1.5, 20
+  )
+  assert payments.sum() == pytest.approx(10000.0)
+
+
+def test_run_matches_across_worker_counts(sqlite_roi_db):
+  calculator = LoanROICalculator(None, backend=sqlite_roi_db)
+  calculator.connect()
+  try:
+    serial = CashFlowSimulator(calculator, chunk_size=50, max_workers=1)
+    serial.create_cashflow_table()
+    inputs, serial_results = serial.run()
+    assert len(inputs['educational_level_id']) > 50
+
+    parallel = CashFlowSimulator(calculator, chunk_size=50, max_workers=3)
+    _, parallel_results = parallel.run()
+
+    for plan in REPAYMENT_PLANS:
+      for metric, values in serial_results[plan].items():
+        np.testing.assert_array_equal(values, parallel_results[plan][metric])
+
+    calculator.cur.execute("SELECT count(*) FROM education_roi_cashflow")
+    assert calculator.cur.fetchone()[0] == len(inputs['educational_level_id']) * len(REPAYMENT_PLANS)
+  finally:
+    calculator.disconnect()
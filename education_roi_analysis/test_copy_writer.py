@@ -0,0 +1,132 @@
+import math
+import struct
+
+import pytest
+
+np = pytest.importorskip('numpy')
+from copy_writer import COPY_HEADER, BinaryCopyWriter, copy_buffers
+
+STRUCT_FORMATS = {'int4': '>i', 'int8': '>q', 'float8': '>d'}
+
+
+def decode(data, types, header=True, trailer=True):
+  """Decode a binary COPY stream field by field with struct"""
+  data = bytes(data)
+  pos = 0
+  if header:
+    assert data[:len(COPY_HEADER)] == COPY_HEADER
+    pos = len(COPY_HEADER)
+  rows = []
+  while pos < len(data):
+    (field_count,) = struct.unpack_from('>h', data, pos)
+    pos += 2
+    if field_count == -1:
+      assert trailer and pos == len(data)
+      return rows
+    assert field_count == len(types)
+    row = []
+    for type_name in types:
+      (length,) = struct.unpack_from('>i', data, pos)
+      pos += 4
+      if length == -1:
+        row.append(None)
+        continue
+      assert length == struct.calcsize(STRUCT_FORMATS[type_name])
+      row.append(struct.unpack_from(STRUCT_FORMATS[type_name], data, pos)[0])
+      pos += length
+    rows.append(tuple(row))
+  assert not trailer
+  return rows
+
+
+class RecordingCursor:
+  """Stands in for a psycopg2 cursor and keeps what copy_expert read"""
+
+  def copy_expert(self, sql, file):
+    self.sql = sql
+    chunks = []
+    while True:
+      chunk = file.read(7)
+      if not chunk:
+        break
+      chunks.append(chunk)
+    self.data = b''.join(chunks)
+
+
+def test_encode_round_trips_values_and_nulls():
+  columns = [
+    [1, 2, np.nan],
+    [5000000000, np.nan, -3],
+    [0.5, -1234.25, np.nan],
+  ]
+  types = ('int4', 'int8', 'float8')
+  view = BinaryCopyWriter().encode(columns, types)
+  assert decode(view, types) == [
+    (1, 5000000000, 0.5),
+    (2, None, -1234.25),
+    (None, -3, None),
+  ]
+
+
+def test_encode_without_header_or_trailer():
+  view = BinaryCopyWriter().encode([[7, 8]], ('int4',), header=False, trailer=False)
+  assert decode(view, ('int4',), header=False, trailer=False) == [(7,), (8,)]
+
+
+def test_encode_empty_columns():
+  view = BinaryCopyWriter().encode([[]], ('float8',))
+  assert decode(view, ('float8',)) == []
+
+
+def test_encode_reuses_buffer():
+  writer = BinaryCopyWriter()
+  writer.encode([np.arange(100, dtype=float)], ('float8',))
+  buffer = writer.buffer
+  view = writer.encode([[1.0, math.inf]], ('float8',))
+  assert writer.buffer is buffer
+  assert decode(view, ('float8',)) == [(1.0,), (math.inf,)]
+
+
+def test_copy_to_and_copy_buffers_stream_the_same_rows():
+  types = ('int4', 'float8')
+  writer = BinaryCopyWriter()
+  cur = RecordingCursor()
+  writer.copy_to(cur, 'facts', ('a', 'b'), [[1, 2, 3], [0.1, np.nan, 0.3]], types)
+  assert cur.sql == "COPY facts (a, b) FROM STDIN WITH (FORMAT binary)"
+  expected = decode(cur.data, types)
+
+  bodies = [
+    writer.encode([[1], [0.1]], types, header=False, trailer=False).tobytes(),
+    writer.encode([[2, 3], [np.nan, 0.3]], types, header=False, trailer=False).tobytes(),
+  ]
+  copy_buffers(cur, 'facts', ('a', 'b'), bodies)
+  assert decode(cur.data, types) == expected == [(1, 0.1), (2, None), (3, 0.3)]
+
+
+def test_integer_columns_are_not_routed_through_float():
+  big = 2**62 + 1
+  types = ('int8', 'int4')
+  view = BinaryCopyWriter().encode([np.array([big, -big]), [7, None]], types)
+  assert decode(view, types) == [(big, 7), (-big, None)]
+
+
+@pytest.mark.parametrize('values, type_name', [
+  ([1.5], 'int4'),
+  ([float(2**53 + 2)], 'int8'),
+  ([2**31], 'int4'),
+  (np.array(['a']), 'int4'),
+])
+def test_lossy_integer_values_are_rejected(values, type_name):
+  with pytest.raises(ValueError):
+    BinaryCopyWriter().encode([values], (type_name,))
+
+
+def test_copy_columns_reuses_one_writer_per_backend():
+  from db_backend import PostgresBackend
+  backend = PostgresBackend(None)
+  backend.copy_columns(RecordingCursor(), 'facts', ('a',), [[1, 2]], ('int4',))
+  writer = backend.copy_writer
+  cur = RecordingCursor()
+  backend.copy_columns(cur, 'facts', ('a',), [[3]], ('int4',))
+  assert backend.copy_writer is writer
+  assert decode(cur.data, ('int4',)) == [(3,)]
@@ -0,0 +1,61 @@
+from db_backend import SQLiteBackend, split_statements, translate_sql
+
+
+def test_translate_sql_rewrites_postgres_constructs():
+  sql = translate_sql(
+    "CREATE TABLE t (id SERIAL PRIMARY KEY, x FLOAT) ON COMMIT DROP; "
+    "SELECT x::numeric FROM t WHERE a IS DISTINCT FROM %(a)s AND b = %s"
+  )
+  assert sql == (
+    "CREATE TABLE t (id INTEGER PRIMARY KEY AUTOINCREMENT, x FLOAT); "
+    "SELECT x FROM t WHERE a IS NOT :a AND b = ?"
+  )
+
+
+def test_split_statements_keeps_semicolons_in_literals():
+  assert split_statements("INSERT INTO t VALUES ('a;b');\n\nSELECT 1;\n") == [
+    "INSERT INTO t VALUES ('a;b');",
+    "SELECT 1;",
+  ]
+
+
+def test_rollback_undoes_multi_statement_script():
+  backend = SQLiteBackend()
+  conn = backend.connect()
+  cur = backend.cursor(conn)
+  cur.execute("CREATE TABLE kept (x INT)")
+  conn.commit()
+
+  cur.execute("INSERT INTO kept VALUES (%s)", (1,))
+  cur.execute("""
+    CREATE TABLE dropped (x INT);
+    INSERT INTO kept VALUES (2);
+  """)
+  conn.rollback()
+
+  cur.execute("SELECT count(*) FROM kept")
+  assert cur.fetchone()[0] == 0
+  cur.execute("SELECT count(*) FROM sqlite_master WHERE name = 'dropped'")
+  assert cur.fetchone()[0] == 0
+  conn.close()
+
+
+def test_reads_do_not_hold_a_lock(tmp_path):
+  backend = SQLiteBackend(str(tmp_path / 'locks.db'))
+  reader = backend.connect()
+  writer = backend.connect()
+  writer.execute("PRAGMA busy_timeout = 50")
+  reader_cur = backend.cursor(reader)
+  writer_cur = backend.cursor(writer)
+  writer_cur.execute("CREATE TABLE t (x INT)")
+  writer.commit()
+
+  reader_cur.execute("SELECT count(*) FROM t")
+  reader_cur.fetchall()
+  writer_cur.execute("INSERT INTO t VALUES (%s)", (1,))
+  writer.commit()
+
+  reader_cur.execute("SELECT count(*) FROM t")
+  assert reader_cur.fetchone()[0] == 1
+  reader.close()
+  writer.close()
@@ -0,0 +1,88 @@
+import math
+
+import pytest
+
+np = pytest.importorskip('numpy')
+from education_roi_with_loans import LoanROICalculator, percentile_bands, roi_draw_bands, simulate_roi_draws
+
+PARAMS = {
+  'n_draws': 20000,
+  'interest_rate': 0.0668,
+  'interest_rate_std': 0.01,
+  'earnings_sigma': 0.25,
+  'earnings_correlation': 0.8,
+  'cost_inflation_years': 1,
+  'loan_term_years': 10,
+  'loan_coverage': 0.7,
+}
+
+
+def one_key_chunk(annual_earnings, baseline_earnings):
+  return {
+    'annual_earnings': np.array([annual_earnings]),
+    'baseline_earnings': np.array([baseline_earnings]),
+    'total_education_cost': np.array([23747.23]),
+    'inflation_mean': np.array([0.03]),
+    'inflation_std': np.array([0.02]),
+  }
+
+
+def test_percentile_bands_match_numpy_without_inf():
+  values = np.random.default_rng(0).normal(size=1001)
+  assert percentile_bands(values) == pytest.approx(np.percentile(values, [5, 50, 95]))
+
+
+def test_percentile_bands_are_inf_among_infinite_draws():
+  values = np.concatenate([np.arange(90, dtype=float), np.full(10, np.inf)])
+  bands = percentile_bands(values)
+  assert bands[:2] == pytest.approx([4.95, 49.5])
+  assert math.isinf(bands[2])
+
+
+def test_never_break_even_draws_push_upper_band_to_inf():
+  band = roi_draw_bands(simulate_roi_draws(one_key_chunk(49470, 45000), PARAMS, np.random.SeedSequence(1))[0])
+  assert band['never_break_even_share'] > 0.05
+  assert math.isinf(band['years_to_break_even_p95'])
+  assert math.isfinite(band['years_to_break_even_p50'])
+
+
+def test_shared_earnings_shock_lowers_never_break_even_share():
+  chunk = one_key_chunk(49470, 41790)
+  independent = roi_draw_bands(
+    simulate_roi_draws(chunk, dict(PARAMS, earnings_correlation=0.0), np.random.SeedSequence(1))[0]
+  )
+  correlated = roi_draw_bands(simulate_roi_draws(chunk, PARAMS, np.random.SeedSequence(1))[0])
+  assert correlated['never_break_even_share'] < independent['never_break_even_share']
+
+
+def test_infinite_bands_are_stored_as_null(sqlite_roi_db):
+  calculator = LoanROICalculator(None, backend=sqlite_roi_db)
+  calculator.connect()
+  try:
+    calculator.create_monte_carlo_table()
+    bands = calculator.calculate_roi_monte_carlo(n_draws=5000, max_workers=1)
+    calculator.cur.execute("""
+      SELECT educational_level_id, year_id, demographic_id, years_to_break_even_p95, never_break_even_share
+      FROM education_roi_monte_carlo
+    """)
+    rows = calculator.cur.fetchall()
+    assert any(p95 is None for _, _, _, p95, _ in rows)
+    for level_id, year_id, demographic_id, p95, share in rows:
+      band = bands[(level_id, year_id, demographic_id)]
+      assert (p95 is None) == math.isinf(band['years_to_break_even_p95'])
+      assert share == pytest.approx(band['never_break_even_share'])
+  finally:
+    calculator.disconnect()
+
+
+def test_bands_do_not_depend_on_the_number_of_workers(sqlite_roi_db):
+  calculator = LoanROICalculator(None, backend=sqlite_roi_db)
+  calculator.connect()
+  try:
+    calculator.create_monte_carlo_table()
+    serial = calculator.calculate_roi_monte_carlo(n_draws=9000, draws_per_task=2000, max_workers=1)
+    parallel = calculator.calculate_roi_monte_carlo(n_draws=9000, draws_per_task=2000, max_workers=3)
+  finally:
+    calculator.disconnect()
+  assert serial == parallel
+  assert len(serial) == 3
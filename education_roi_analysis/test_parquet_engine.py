@@ -0,0 +1,88 @@
+import os
+
+import pytest
+
+pytest.importorskip('duckdb')
+pytest.importorskip('pandas')
+pytest.importorskip('openpyxl')
+from education_roi_with_loans import LoanROICalculator
+from parquet_engine import PARQUET_TABLES, ParquetROIEngine
+
+MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
+EARNINGS_FILE = os.path.join(MODULE_DIR, 'tabn502_30.xlsx')
+COST_FILE = os.path.join(MODULE_DIR, 'tabn334_10.xlsx')
+
+
+@pytest.fixture
+def engine(tmp_path):
+  engine = ParquetROIEngine(str(tmp_path / 'parquet'), threads=2)
+  engine.connect()
+  engine.export_parquet(EARNINGS_FILE, COST_FILE)
+  yield engine
+  engine.disconnect()
+
+
+def sqlite_rows(backend, query):
+  conn = backend.connect()
+  try:
+    cur = backend.cursor(conn)
+    cur.execute(query)
+    return sorted(tuple(row) for row in cur.fetchall())
+  finally:
+    conn.close()
+
+
+def test_paths_with_quotes_are_escaped(tmp_path):
+  engine = ParquetROIEngine(str(tmp_path / "o'brien's data"), threads=2)
+  engine.connect()
+  try:
+    engine.export_parquet(EARNINGS_FILE, COST_FILE)
+    results = engine.calculate_roi_with_loans()
+  finally:
+    engine.disconnect()
+
+  for table_name in PARQUET_TABLES + ('education_roi_with_loans',):
+    assert os.path.exists(engine.parquet_path(table_name))
+  assert list(results['educational_level_id']) == [4, 5, 6]
+
+
+@pytest.mark.parametrize('query', [
+  "SELECT year_id, year FROM dim_year",
+  "SELECT educational_level_id, education_level_name FROM dim_educational_level",
+  "SELECT demographics_id, gender_id, race_ethnicity_id FROM dim_demographic",
+  "SELECT educational_level_id, year_id, cost FROM expenditure_per_full_time_student",
+])
+def test_surrogate_ids_match_the_loaders(engine, sqlite_roi_db, query):
+  engine.register_views()
+  duckdb_rows = sorted(tuple(row) for row in engine.conn.execute(query).fetchall())
+  assert duckdb_rows == sqlite_rows(sqlite_roi_db, query)
+
+
+def test_full_cartesian_recompute(engine, sqlite_roi_db):
+  full = engine.calculate_roi_with_loans(demographic_id=None, cost_year_id=None)
+  default = engine.calculate_roi_with_loans()
+
+  expected_keys = sqlite_rows(sqlite_roi_db, """
+    SELECT e.educational_level_id, e.year_id, e.demographic_id
+    FROM Median_annual_earnings e
+    JOIN expenditure_per_full_time_student c
+      ON e.educational_level_id = c.educational_level_id
+      AND e.year_id = c.year_id
+    WHERE e.annual_earnings > 0 AND ROUND(c.cost, 2) <> 0
+  """)
+  keys = sorted(zip(full['educational_level_id'], full['year_id'], full['demographic_id']))
+  assert keys == expected_keys
+  assert len(set(full['year_id'])) > 1 and len(set(full['demographic_id'])) > 1
+
+  subset = full[(full['year_id'] == 13) & (full['demographic_id'] == 15)].reset_index(drop=True)
+  assert len(subset) == len(default)
+  for subset_row, default_row in zip(subset.itertuples(index=False), default.itertuples(index=False)):
+    assert tuple(subset_row) == pytest.approx(tuple(default_row))
+
+  calculator = LoanROICalculator(None)
+  for row in full.itertuples(index=False):
+    loan_amount = row.total_education_cost * calculator.loan_coverage
+    assert row.loan_amount == pytest.approx(loan_amount, abs=0.01)
+    assert row.monthly_loan_payment == pytest.approx(
+      calculator.calculate_monthly_loan_payment(loan_amount), abs=0.01
+    )
@@ -0,0 +1,93 @@
+from query_cache import QueryCache
+
+
+class FakeClock:
+  def __init__(self):
+    self.now = 0.0
+
+  def __call__(self):
+    return self.now
+
+
+class CountingLoader:
+  def __init__(self, result):
+    self.result = result
+    self.calls = 0
+
+  def __call__(self):
+    self.calls += 1
+    return self.result
+
+
+def test_hits_return_cached_rows_and_count_stats():
+  cache = QueryCache()
+  loader = CountingLoader([(1, 'a')])
+  assert cache.get_or_load("SELECT 1", None, loader) == [(1, 'a')]
+  assert cache.get_or_load("SELECT 1", None, loader) == [(1, 'a')]
+  assert loader.calls == 1
+  stats = cache.stats()
+  assert (stats['hits'], stats['misses'], stats['entries'], stats['hit_rate']) == (1, 1, 1, 0.5)
+
+
+def test_params_are_part_of_the_key():
+  cache = QueryCache()
+  loader = CountingLoader([])
+  cache.get_or_load("SELECT %s", [1], loader)
+  cache.get_or_load("SELECT %s", (1,), loader)
+  cache.get_or_load("SELECT %(a)s, %(b)s", {'a': 1, 'b': 2}, loader)
+  cache.get_or_load("SELECT %(a)s, %(b)s", {'b': 2, 'a': 1}, loader)
+  cache.get_or_load("SELECT %s", [2], loader)
+  assert loader.calls == 3
+
+
+def test_entries_expire_after_ttl():
+  clock = FakeClock()
+  cache = QueryCache(ttl_seconds=300, clock=clock)
+  loader = CountingLoader([])
+  cache.get_or_load("SELECT 1", None, loader)
+  clock.now = 299.0
+  cache.get_or_load("SELECT 1", None, loader)
+  assert loader.calls == 1
+  clock.now = 300.0
+  cache.get_or_load("SELECT 1", None, loader)
+  assert loader.calls == 2
+  assert cache.stats()['expirations'] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+  cache = QueryCache(max_entries=2)
+  loader = CountingLoader([])
+  cache.get_or_load("SELECT 1", None, loader)
+  cache.get_or_load("SELECT 2", None, loader)
+  cache.get_or_load("SELECT 1", None, loader)
+  cache.get_or_load("SELECT 3", None, loader)
+  assert cache.stats()['evictions'] == 1
+
+  cache.get_or_load("SELECT 1", None, loader)
+  assert loader.calls == 3
+  cache.get_or_load("SELECT 2", None, loader)
+  assert loader.calls == 4
+
+
+def test_bump_version_invalidates_everything():
+  cache = QueryCache()
+  loader = CountingLoader([])
+  cache.get_or_load("SELECT 1", None, loader)
+  assert cache.bump_version() == 1
+  assert cache.stats()['entries'] == 0
+  cache.get_or_load("SELECT 1", None, loader)
+  assert loader.calls == 2
+
+
+def test_sync_version_invalidates_only_when_source_moves():
+  cache = QueryCache()
+  loader = CountingLoader([])
+  cache.sync_version(4)
+  cache.get_or_load("SELECT 1", None, loader)
+  cache.sync_version(4)
+  cache.get_or_load("SELECT 1", None, loader)
+  assert loader.calls == 1
+  cache.sync_version(5)
+  cache.get_or_load("SELECT 1", None, loader)
+  assert loader.calls == 2
+  assert cache.stats()['source_version'] == 5
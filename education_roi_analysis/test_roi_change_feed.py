@@ -0,0 +1,138 @@
+import pytest
+from education_roi_with_loans import LoanROICalculator
+
+
+@pytest.fixture
+def calculator(sqlite_roi_db):
+  calculator = LoanROICalculator(None, backend=sqlite_roi_db)
+  calculator.connect()
+  calculator.create_roi_loan_table()
+  calculator.calculate_roi_with_loans()
+  yield calculator
+  calculator.disconnect()
+
+
+def stored_keys(calculator):
+  calculator.cur.execute(
+    "SELECT educational_level_id, year_id, demographic_id FROM education_roi_with_loans"
+  )
+  return set(calculator.cur.fetchall())
+
+
+def test_unchanged_inputs_log_no_changes(calculator):
+  version = calculator.get_current_version()
+  calculator.calculate_roi_with_loans()
+  assert list(calculator.stream_changes_since(version)) == []
+
+
+def test_vanished_cost_is_deleted_and_logged(calculator):
+  assert (4, 13, 15) in stored_keys(calculator)
+  version = calculator.get_current_version()
+
+  calculator.cur.execute(
+    "DELETE FROM Expenditure_per_full_time_student WHERE educational_level_id = 4 AND year_id = 13"
+  )
+  calculator.conn.commit()
+  calculator.calculate_roi_with_loans()
+
+  changes = list(calculator.stream_changes_since(version))
+  assert [change[2:6] for change in changes] == [('D', 4, 13, 15)]
+  assert (4, 13, 15) not in stored_keys(calculator)
+
+
+def test_zero_cost_is_deleted_and_logged(calculator):
+  version = calculator.get_current_version()
+
+  calculator.cur.execute(
+    "UPDATE Expenditure_per_full_time_student SET cost = 0 WHERE educational_level_id = 5 AND year_id = 13"
+  )
+  calculator.conn.commit()
+  calculator.calculate_roi_with_loans()
+
+  changes = list(calculator.stream_changes_since(version))
+  assert [change[2:6] for change in changes] == [('D', 5, 13, 15)]
+  assert (5, 13, 15) not in stored_keys(calculator)
+
+
+def run_scheduled_job(backend):
+  """The create-then-calculate sequence main() runs"""
+  calculator = LoanROICalculator(None, backend=backend)
+  calculator.connect()
+  try:
+    calculator.create_roi_loan_table()
+    calculator.calculate_roi_with_loans()
+    return calculator.last_version
+  finally:
+    calculator.disconnect()
+
+
+def test_rerunning_scheduled_job_logs_no_changes(sqlite_roi_db):
+  version = run_scheduled_job(sqlite_roi_db)
+  run_scheduled_job(sqlite_roi_db)
+
+  calculator = LoanROICalculator(None, backend=sqlite_roi_db)
+  calculator.connect()
+  try:
+    assert list(calculator.stream_changes_since(version)) == []
+  finally:
+    calculator.disconnect()
+
+
+def test_reset_logs_resync_marker(calculator):
+  version = calculator.get_current_version()
+  calculator.create_roi_loan_table(reset=True)
+  calculator.calculate_roi_with_loans()
+
+  operations = [change[2] for change in calculator.stream_changes_since(version)]
+  assert operations == ['T', 'I', 'I', 'I']
+
+
+def test_overlapping_run_waits_for_the_lock(calculator, sqlite_roi_db):
+  import sqlite3
+  calculator.backend.lock_table(calculator.cur, 'education_roi_with_loans')
+
+  other = LoanROICalculator(None, backend=sqlite_roi_db)
+  other.connect()
+  try:
+    other.conn.execute("PRAGMA busy_timeout = 50")
+    with pytest.raises(sqlite3.OperationalError, match='locked'):
+      other.calculate_roi_with_loans()
+  finally:
+    other.disconnect()
+    calculator.conn.rollback()
+
+
+def test_streams_for_the_same_version_get_their_own_cursor(calculator):
+  names = []
+  named_cursor = calculator.backend.named_cursor
+
+  def recording_named_cursor(conn, name, itersize=1000):
+    names.append(name)
+    return named_cursor(conn, name, itersize)
+
+  calculator.backend.named_cursor = recording_named_cursor
+  first = calculator.stream_changes_since(0)
+  second = calculator.stream_changes_since(0)
+  assert next(first)[:3] == next(second)[:3]
+  assert len(set(names)) == 2
+
+
+def test_recompute_in_another_process_invalidates_cached_summary(calculator, sqlite_roi_db):
+  before = calculator.get_roi_summary()
+  assert calculator.get_roi_summary() == before
+  assert calculator.get_cache_stats()['hits'] == 1
+
+  cron = LoanROICalculator(None, backend=sqlite_roi_db)
+  cron.connect()
+  try:
+    cron.cur.execute(
+      "UPDATE Expenditure_per_full_time_student SET cost = cost * 2 WHERE educational_level_id = 4 AND year_id = 13"
+    )
+    cron.conn.commit()
+    cron.calculate_roi_with_loans()
+  finally:
+    cron.disconnect()
+
+  after = calculator.get_roi_summary()
+  assert after != before
+  assert calculator.get_cache_stats()['hits'] == 1
@@ -0,0 +1,84 @@
+import os
+
+import pytest
+from education_roi_with_loans import LoanROICalculator, ROI_COLUMNS
+
+MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# education_roi_with_loans for demographic 15 and cost year 13 on the bundled workbooks,
+# as produced by the PostgreSQL pipeline
+EXPECTED_ROI_ROWS = [
+  (4, 13, 15, 23747.23, 16623.06, 22833.3, 190.28, 49470, 41790, 3932.22, 29957.47, 640, 464742.53, 0.05, 3.9),
+  (5, 13, 15, 49372.11, 34560.48, 47471.98, 395.6, 54210, 41790, 4121.9, 62283.61, 1035, 479816.39, 0.09, 5.01),
+  (6, 13, 15, 58039.66, 40627.76, 55805.95, 465.05, 66610, 41790, 5085.78, 73217.85, 2068.33, 592882.15, 0.08, 2.95),
+]
+
+
+def roi_rows(backend):
+  calculator = LoanROICalculator(None, backend=backend)
+  calculator.connect()
+  try:
+    calculator.create_roi_loan_table()
+    calculator.calculate_roi_with_loans()
+    calculator.cur.execute(
+      f"SELECT {', '.join(ROI_COLUMNS)} FROM education_roi_with_loans ORDER BY educational_level_id"
+    )
+    return calculator.cur.fetchall()
+  finally:
+    calculator.disconnect()
+
+
+def fact_rows(backend, table_name):
+  conn = backend.connect()
+  try:
+    cur = backend.cursor(conn)
+    cur.execute(f"SELECT * FROM {table_name} ORDER BY 2, 3, 4")
+    return [row[1:] for row in cur.fetchall()]
+  finally:
+    conn.close()
+
+
+def test_sqlite_roi_rows_match_postgres(sqlite_roi_db):
+  rows = roi_rows(sqlite_roi_db)
+  assert len(rows) == len(EXPECTED_ROI_ROWS)
+  for row, expected in zip(rows, EXPECTED_ROI_ROWS):
+    assert row[:3] == expected[:3]
+    assert row[3:] == pytest.approx(expected[3:], abs=0.005)
+
+
+def test_parallel_load_matches_serial_load(sqlite_roi_db, tmp_path):
+  from db_backend import SQLiteBackend
+  from load_tabn502_30 import EducationDataLoader
+
+  backend = SQLiteBackend(str(tmp_path / 'parallel.db'))
+  loader = EducationDataLoader(None, backend=backend)
+  loader.connect()
+  try:
+    loader.create_schema()
+    loader.insert_dimension_data()
+    loader.load_data_parallel(os.path.join(MODULE_DIR, 'tabn502_30.xlsx'), max_workers=2)
+  finally:
+    loader.disconnect()
+
+  for table_name in ('Median_annual_earnings', 'educational_attainment'):
+    assert fact_rows(backend, table_name) == fact_rows(sqlite_roi_db, table_name)
+
+
+def test_duckdb_engine_matches_sqlite(sqlite_roi_db, tmp_path):
+  pytest.importorskip('duckdb')
+  from parquet_engine import ParquetROIEngine
+
+  engine = ParquetROIEngine(str(tmp_path / 'parquet'), threads=2)
+  engine.connect()
+  try:
+    engine.export_parquet(
+      os.path.join(MODULE_DIR, 'tabn502_30.xlsx'), os.path.join(MODULE_DIR, 'tabn334_10.xlsx')
+    )
+    frame = engine.calculate_roi_with_loans()
+  finally:
+    engine.disconnect()
+
+  rows = roi_rows(sqlite_roi_db)
+  assert len(frame) == len(rows)
+  for duckdb_row, sqlite_row in zip(frame.itertuples(index=False), rows):
+    assert tuple(duckdb_row) == pytest.approx(sqlite_row, abs=0.005)